@@ -6,6 +6,4 @@ class AccountsConfig(AppConfig):
     name = "accounts"
 
     def ready(self):
-        from .bootstrap import ensure_initial_admin
-
-        ensure_initial_admin(silent_fail=True)
+        from . import signals  # noqa: F401
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router
+
+from core.cache_utils import acache_version, bump_cache_version, cache_version
+from core.instrumentation import record_cache
+
+from .models import User
+
+SNAPSHOT_FIELDS = (
+    "id",
+    "email",
+    "name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "must_change_password",
+)
+
+
+def _version_key(user_id):
+    return f"accounts:user_version:{user_id}"
+
+
+def snapshot_key(user_id):
+    return f"accounts:user:{user_id}:{cache_version(_version_key(user_id))}"
+
+
+PERMISSIONS_VERSION_KEY = "accounts:permissions_version"
+
+
+async def asnapshot_key(user_id):
+    return f"accounts:user:{user_id}:{await acache_version(_version_key(user_id))}"
+
+
+def invalidate_user_snapshots(user_ids):
+    for user_id in user_ids:
+        bump_cache_version(_version_key(user_id))
+
+
+def invalidate_permissions():
+    """Drop every cached permission set, e.g. after a group's permissions change."""
+    bump_cache_version(PERMISSIONS_VERSION_KEY)
+
+
+def permissions_key(user_id):
+    return (
+        f"accounts:perms:{user_id}:{cache_version(_version_key(user_id))}:"
+        f"{cache_version(PERMISSIONS_VERSION_KEY)}"
+    )
+
+
+def user_snapshot(user):
+    snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+    snapshot["session_auth_hash"] = user.get_session_auth_hash()
+    return snapshot
+
+
+def user_from_snapshot(snapshot):
+    # Fields outside the snapshot stay deferred and load on first access. from_db
+    # expects the loaded values in model field order.
+    field_names = [
+        field.attname for field in User._meta.concrete_fields if field.attname in snapshot
+    ]
+    user = User.from_db(
+        router.db_for_read(User), field_names, [snapshot[name] for name in field_names]
+    )
+    user._snapshot_session_auth_hash = snapshot["session_auth_hash"]
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose per-request user lookup is served from a cached snapshot.
+
+    Snapshots are keyed by user id and a per-user version that signals bump on
+    every save, delete and group or permission change. Resolved permission sets
+    are cached the same way, plus a global version for group permission edits.
+    Version bumps only reach other workers through a shared cache, so without one
+    (``USER_CACHE_ENABLED`` is false) this behaves exactly like ``ModelBackend``.
+    """
+
+    def get_user(self, user_id):
+        if not settings.USER_CACHE_ENABLED:
+            return super().get_user(user_id)
+        try:
+            key = snapshot_key(int(user_id))
+        except (TypeError, ValueError):
+            return None
+        snapshot = cache.get(key)
+        record_cache(hit=snapshot is not None)
+        if snapshot is not None:
+            user = user_from_snapshot(snapshot)
+            return user if self.user_can_authenticate(user) else None
+
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, user_snapshot(user), settings.USER_SNAPSHOT_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        if not settings.USER_CACHE_ENABLED:
+            return await super().aget_user(user_id)
+        try:
+            key = await asnapshot_key(int(user_id))
+        except (TypeError, ValueError):
+            return None
+        snapshot = await cache.aget(key)
+        record_cache(hit=snapshot is not None)
+        if snapshot is not None:
+            user = user_from_snapshot(snapshot)
+            return user if self.user_can_authenticate(user) else None
+
+        user = await super().aget_user(user_id)
+        if user is not None:
+            await cache.aset(key, user_snapshot(user), settings.USER_SNAPSHOT_CACHE_TIMEOUT)
+        return user
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not settings.USER_CACHE_ENABLED:
+            return super().get_all_permissions(user_obj, obj)
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            key = permissions_key(user_obj.pk)
+            permissions = cache.get(key)
+            record_cache(hit=permissions is not None)
+            if permissions is None:
+                permissions = super().get_all_permissions(user_obj)
+                cache.set(key, permissions, settings.PERMISSION_CACHE_TIMEOUT)
+            user_obj._perm_cache = permissions
+        return user_obj._perm_cache
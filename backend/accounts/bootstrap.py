@@ -37,7 +37,7 @@ def ensure_initial_admin(silent_fail=False):
 
     if reset_existing:
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get_by_natural_key(email)
         except User.DoesNotExist:
             return
         user.set_password(password)
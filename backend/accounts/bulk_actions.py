@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.cache_utils import bump_table_version
+from core.email_utils import resolve_from_email
+from core.mail_queue import drain_queue_in_background, enqueue_emails, outbound_email
+from core.models import SiteSettings
+
+from .backends import invalidate_user_snapshots
+from .models import User
+
+BULK_FLAGS = ("is_active", "is_staff")
+
+
+def remaining_active_admins(excluding):
+    """Count active admins outside ``excluding`` with one query, locking every active admin.
+
+    Call it in the transaction that demotes or deactivates ``excluding``: a concurrent
+    check then waits for that transaction and sees its result, so two requests can't
+    each remove a different one of the last two admins.
+    """
+    admins = User.objects.select_for_update().filter(is_staff=True, is_active=True)
+    return len(set(admins.values_list("pk", flat=True)) - set(excluding))
+
+
+def set_flag(user_ids, field, value):
+    """Set ``is_active`` or ``is_staff`` on many users with one UPDATE.
+
+    ``update()`` skips the ``User`` signals, so the cached user snapshots and the
+    list version are invalidated here once the change commits. Neither flag is
+    part of the search index.
+    """
+    if field not in BULK_FLAGS:
+        raise ValueError(f"{field} cannot be changed in bulk.")
+    changed = (
+        User.objects.filter(pk__in=user_ids).exclude(**{field: value}).update(**{field: value})
+    )
+    if changed:
+
+        def invalidate():
+            invalidate_user_snapshots(user_ids)
+            bump_table_version(User)
+
+        # After commit, so no request caches the old rows under the new version.
+        transaction.on_commit(invalidate)
+    return changed
+
+
+def add_to_group(user_ids, group_id):
+    """Add users to a group with one insert into the membership table.
+
+    Call it in a transaction. The group is checked and locked in the database
+    rather than trusted from the cached choices, which other workers may still
+    offer after it was deleted; ``Group.DoesNotExist`` is raised if it is gone.
+    """
+    if not Group.objects.select_for_update().filter(pk=group_id).exists():
+        raise Group.DoesNotExist(f"Group {group_id} does not exist.")
+    Membership = User.groups.through
+    added = list(
+        User.objects.filter(pk__in=user_ids).exclude(groups=group_id).values_list("pk", flat=True)
+    )
+    # A concurrent request may have added some of them since; the unique constraint decides.
+    Membership.objects.bulk_create(
+        [Membership(user_id=user_id, group_id=group_id) for user_id in added],
+        ignore_conflicts=True,
+    )
+    if added:
+        transaction.on_commit(lambda: invalidate_user_snapshots(added))
+    return len(added)
+
+
+def queue_password_resets(
+    user_ids,
+    request,
+    subject_template_name="registration/password_reset_subject.txt",
+    email_template_name="registration/password_reset_email.html",
+):
+    """Queue a password reset email for each active user with an address.
+
+    Unlike the public reset form this includes users without a usable password,
+    such as imported ones, since an admin asked for it. All messages go into the
+    outbox with one insert; the mailer worker sends them, or a background thread
+    when the queue is disabled.
+    """
+    site_settings = SiteSettings.get_solo()
+    from_email = resolve_from_email(site_settings)
+    current_site = get_current_site(request)
+    emails = []
+    users = User.objects.filter(pk__in=user_ids, is_active=True).exclude(email="")
+    for user in users:
+        context = {
+            "email": user.email,
+            "domain": current_site.domain,
+            "site_name": current_site.name,
+            "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+            "user": user,
+            "token": default_token_generator.make_token(user),
+            "protocol": "https" if request.is_secure() else "http",
+        }
+        subject = "".join(render_to_string(subject_template_name, context).splitlines())
+        body = render_to_string(email_template_name, context)
+        emails.append(outbound_email(subject, body, from_email, [user.email]))
+
+    enqueue_emails(emails)
+    if emails and not settings.EMAIL_QUEUE_ENABLED:
+        transaction.on_commit(drain_queue_in_background)
+    return len(emails)
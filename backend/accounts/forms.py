@@ -1,14 +1,18 @@
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm, PasswordResetForm
 from django.contrib.auth.models import Group
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 
-from core.email_utils import get_email_connection, resolve_from_email
+from core.email_utils import pooled_email_connection, resolve_from_email, send_email_message
 from core.forms import apply_tailwind_classes
+from core.mail_queue import enqueue_email
 from core.models import SiteSettings
 
+from .permissions import group_choices
+
 User = get_user_model()
 
 
@@ -78,6 +82,7 @@ class AdminUserForm(forms.ModelForm):
         self.fields["is_staff"].widget.attrs[
             "class"
         ] = "h-4 w-4 rounded border-slate-300 text-slate-700"
+        self.fields["groups"].choices = group_choices()
 
 
 class AdminUserCreateForm(forms.ModelForm):
@@ -105,6 +110,7 @@ class AdminUserCreateForm(forms.ModelForm):
         self.fields["must_change_password"].widget.attrs[
             "class"
         ] = "h-4 w-4 rounded border-slate-300 text-slate-700"
+        self.fields["groups"].choices = group_choices()
 
     def clean(self):
         cleaned_data = super().clean()
@@ -134,6 +140,13 @@ class SitePasswordResetForm(PasswordResetForm):
         super().__init__(*args, **kwargs)
         apply_tailwind_classes(self)
 
+    def get_users(self, email):
+        # Emails are stored lowercased, so this is an exact match on the unique index.
+        users = User._default_manager.filter(
+            email=User.objects.normalize_email(email), is_active=True
+        )
+        return (user for user in users if user.has_usable_password())
+
     def send_mail(
         self,
         subject_template_name,
@@ -146,17 +159,25 @@ class SitePasswordResetForm(PasswordResetForm):
         subject = render_to_string(subject_template_name, context)
         subject = "".join(subject.splitlines())
         body = render_to_string(email_template_name, context)
-        email_message = EmailMultiAlternatives(
-            subject,
-            body,
-            from_email,
-            [to_email],
-            connection=get_email_connection(SiteSettings.get_solo()),
-        )
+        html_email = None
         if html_email_template_name:
             html_email = render_to_string(html_email_template_name, context)
-            email_message.attach_alternative(html_email, "text/html")
-        email_message.send()
+
+        if settings.EMAIL_QUEUE_ENABLED:
+            enqueue_email(subject, body, from_email, [to_email], html_body=html_email)
+            return
+
+        with pooled_email_connection(SiteSettings.get_solo()) as connection:
+            email_message = EmailMultiAlternatives(
+                subject,
+                body,
+                from_email,
+                [to_email],
+                connection=connection,
+            )
+            if html_email:
+                email_message.attach_alternative(html_email, "text/html")
+            send_email_message(email_message)
 
     def save(
         self,
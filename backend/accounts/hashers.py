@@ -0,0 +1,118 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class HashingBusy(Exception):
+    """Raised when no hashing slot frees up within PASSWORD_HASHING_QUEUE_TIMEOUT."""
+
+
+_state_lock = threading.Lock()
+_slots = None
+_executor = None
+_pending = 0
+_held = threading.local()
+
+
+def _get_slots():
+    global _slots
+    if _slots is None:
+        with _state_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_CONCURRENCY)
+    return _slots
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _state_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_CONCURRENCY,
+                    thread_name_prefix="password-hashing",
+                )
+    return _executor
+
+
+@receiver(setting_changed)
+def _reset_hashing_pool(setting, **kwargs):
+    global _slots, _executor
+    if setting == "PASSWORD_HASHING_CONCURRENCY":
+        with _state_lock:
+            _slots = None
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = None
+
+
+@contextmanager
+def hashing_slot():
+    """Cap how many hashes run at once so a login storm cannot take every CPU."""
+    # verify() calls encode() internally; a thread that already holds a slot keeps it.
+    if getattr(_held, "slot", False):
+        yield
+        return
+    slots = _get_slots()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_QUEUE_TIMEOUT):
+        raise HashingBusy
+    _held.slot = True
+    try:
+        yield
+    finally:
+        _held.slot = False
+        slots.release()
+
+
+async def run_hashing(func, *args, **kwargs):
+    """Run a hashing call on the bounded pool without blocking the event loop."""
+    global _pending
+    with _state_lock:
+        if _pending >= settings.PASSWORD_HASHING_MAX_PENDING:
+            raise HashingBusy
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+    finally:
+        with _state_lock:
+            _pending -= 1
+
+
+class BoundedHasherMixin:
+    def encode(self, *args, **kwargs):
+        with hashing_slot():
+            return super().encode(*args, **kwargs)
+
+    def verify(self, *args, **kwargs):
+        with hashing_slot():
+            return super().verify(*args, **kwargs)
+
+
+class PBKDF2PasswordHasher(BoundedHasherMixin, hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(BoundedHasherMixin, hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class Argon2PasswordHasher(BoundedHasherMixin, hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+
+class PBKDF2SHA1PasswordHasher(BoundedHasherMixin, hashers.PBKDF2SHA1PasswordHasher):
+    pass
@@ -0,0 +1,55 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmarking import format_summary, measure, rolled_back, seed_users
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the login/password reset email lookup as the user table grows, against the "
+        "case-insensitive email__iexact lookup it replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10000,100000,1000000",
+            help="Comma-separated table sizes to measure at.",
+        )
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument(
+            "--iexact-iterations",
+            type=int,
+            default=5,
+            help="Iterations for email__iexact, which scans the table.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        with rolled_back():
+            seeded = 0
+            for step, size in enumerate(sizes):
+                if size > seeded:
+                    self.stdout.write(f"Seeding up to {size} users (rolled back afterwards)...")
+                    seed_users(size - seeded, prefix=f"login{step}-")
+                    seeded = size
+                # Users type their address in any case; the lookup normalizes it.
+                emails = [
+                    email.upper()
+                    for email in User.objects.order_by("?").values_list("email", flat=True)[:50]
+                ]
+
+                def canonical():
+                    User.objects.get_by_natural_key(random.choice(emails))
+
+                def iexact():
+                    User.objects.get(email__iexact=random.choice(emails))
+
+                samples = measure(canonical, options["iterations"])
+                self.stdout.write(format_summary(f"canonical {size}", samples))
+                samples = measure(iexact, options["iexact_iterations"])
+                self.stdout.write(format_summary(f"iexact {size}", samples))
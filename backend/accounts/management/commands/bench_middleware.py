@@ -0,0 +1,81 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.test import RequestFactory
+from django.urls import resolve
+
+from accounts.middleware import MustChangePasswordMiddleware
+
+User = get_user_model()
+
+
+class ResolvingMustChangePasswordMiddleware:
+    """The previous resolve()-per-request implementation, kept as the baseline."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.user.is_authenticated and request.user.must_change_password:
+            try:
+                current_view = resolve(request.path_info).view_name
+            except Exception:
+                current_view = ""
+            force_change_url_name = getattr(
+                settings, "FORCE_PASSWORD_CHANGE_URL_NAME", "force-password-change"
+            )
+            allowed_views = {force_change_url_name, "logout"}
+            if current_view not in allowed_views and not request.path_info.startswith("/static/"):
+                return redirect(force_change_url_name)
+        return self.get_response(request)
+
+
+class Command(BaseCommand):
+    help = "Measure per-request overhead of MustChangePasswordMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        factory = RequestFactory()
+        paths = ["/dashboard/", "/admin/users/", "/force-password-change/", "/static/app.css"]
+        users = {
+            "anonymous": AnonymousUser(),
+            "active user": User(email="bench@example.com"),
+            "must change password": User(email="bench@example.com", must_change_password=True),
+        }
+        implementations = {
+            "no middleware": None,
+            "resolve per request": ResolvingMustChangePasswordMiddleware,
+            "precompiled matcher": MustChangePasswordMiddleware,
+        }
+
+        def view(request):
+            return HttpResponse()
+
+        for user_label, user in users.items():
+            requests = []
+            for index in range(count):
+                request = factory.get(paths[index % len(paths)])
+                request.user = user
+                requests.append(request)
+            baseline = None
+            for label, middleware_class in implementations.items():
+                handler = middleware_class(view) if middleware_class else view
+                handler(requests[0])
+                started = time.perf_counter()
+                for request in requests:
+                    handler(request)
+                per_request = (time.perf_counter() - started) / count * 1_000_000
+                if baseline is None:
+                    baseline = per_request
+                self.stdout.write(
+                    f"{user_label:<22} {label:<22} {per_request:8.3f}us/request "
+                    f"(+{per_request - baseline:.3f}us)"
+                )
@@ -0,0 +1,113 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+
+from core.benchmarking import format_summary, measure, summarize
+
+PBKDF2_MINIMUM_ITERATIONS = 600_000
+
+
+class Command(BaseCommand):
+    help = "Measure password hash cost on this host and recommend hasher settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=250.0)
+        parser.add_argument("--iterations", type=int, default=5)
+
+    def handle(self, *args, **options):
+        target = options["target_ms"]
+        iterations = options["iterations"]
+        salt = hashers.PBKDF2PasswordHasher().salt()
+        password = "correct horse battery staple"
+
+        pbkdf2 = hashers.PBKDF2PasswordHasher()
+        current = settings.PASSWORD_PBKDF2_ITERATIONS
+        pbkdf2_ms = self._report(
+            f"pbkdf2 {current}",
+            lambda: pbkdf2.encode(password, salt, current),
+            iterations,
+        )
+        pbkdf2_iterations = self._scale(current, target / pbkdf2_ms, step=10_000)
+
+        scrypt = hashers.ScryptPasswordHasher()
+        work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+        scrypt_ms = self._report(
+            f"scrypt n={work_factor}",
+            lambda: scrypt.encode(password, salt, n=work_factor),
+            iterations,
+        )
+        scrypt_work_factor = self._scrypt_work_factor(
+            scrypt, password, salt, work_factor * target / scrypt_ms
+        )
+
+        argon2_time_cost = None
+        argon2 = hashers.Argon2PasswordHasher()
+        try:
+            argon2._load_library()
+        except ValueError:
+            self.stdout.write("argon2                   skipped (pip install argon2-cffi)")
+        else:
+            argon2.time_cost = settings.PASSWORD_ARGON2_TIME_COST
+            argon2_ms = self._report(
+                f"argon2 t={argon2.time_cost}", lambda: argon2.encode(password, salt), iterations
+            )
+            argon2_time_cost = self._scale(argon2.time_cost, target / argon2_ms, step=1)
+
+        concurrency = settings.PASSWORD_HASHING_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = measure(
+                lambda: list(
+                    executor.map(
+                        lambda _: pbkdf2.encode(password, salt, current), range(concurrency)
+                    )
+                ),
+                iterations,
+            )
+        batch_ms = summarize(samples)["p50_ms"]
+        self.stdout.write(
+            f"\nWith PASSWORD_HASHING_CONCURRENCY={concurrency} this host sustains about "
+            f"{concurrency * 1000 / batch_ms:.1f} PBKDF2 logins/s at the current settings."
+        )
+
+        self.stdout.write(f"\nRecommended settings for ~{target:.0f}ms per hash:")
+        if argon2_time_cost is not None:
+            self.stdout.write(
+                f"  PASSWORD_HASHER_PROFILE=argon2 PASSWORD_ARGON2_TIME_COST={argon2_time_cost}"
+            )
+        self.stdout.write(
+            f"  PASSWORD_HASHER_PROFILE=scrypt PASSWORD_SCRYPT_WORK_FACTOR={scrypt_work_factor}"
+        )
+        self.stdout.write(
+            f"  PASSWORD_HASHER_PROFILE=pbkdf2 PASSWORD_PBKDF2_ITERATIONS={pbkdf2_iterations}"
+        )
+        if pbkdf2_iterations < PBKDF2_MINIMUM_ITERATIONS:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"  PBKDF2 would fall below {PBKDF2_MINIMUM_ITERATIONS} iterations at this "
+                    "target; prefer argon2 or scrypt, or raise --target-ms."
+                )
+            )
+
+    def _report(self, label, func, iterations):
+        func()
+        samples = measure(func, iterations)
+        self.stdout.write(format_summary(label, samples))
+        return summarize(samples)["p50_ms"]
+
+    def _scale(self, current, factor, step):
+        return max(step, int(round(current * factor / step)) * step)
+
+    def _scrypt_work_factor(self, scrypt, password, salt, estimate):
+        # scrypt needs a power of two, and OpenSSL caps its memory use.
+        work_factor = 2 ** max(10, round(math.log2(max(estimate, 1))))
+        while work_factor > 1024:
+            try:
+                scrypt.encode(password, salt, n=work_factor)
+            except ValueError:
+                work_factor //= 2
+            else:
+                break
+        return work_factor
@@ -0,0 +1,69 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importing import (
+    IMPORT_FORMATS,
+    READ_ERRORS,
+    UserImporter,
+    describe_read_error,
+    detect_format,
+    iter_rows,
+    open_text,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV or JSONL file (columns: email, name, is_active, is_staff, "
+        "groups separated by ';'). Imported users get an unusable password and must set one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for standard input.")
+        parser.add_argument("--format", choices=IMPORT_FORMATS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--errors", help="Write rejected rows to this CSV file.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        import_format = options["format"] or detect_format(path)
+        try:
+            binary = sys.stdin.buffer if path == "-" else open(path, "rb")
+        except OSError as exc:
+            raise CommandError(f"Cannot open {path}: {exc.strerror}.") from exc
+
+        def progress(result):
+            self.stdout.write(
+                f"Processed {result.processed} rows: {result.created} created, "
+                f"{len(result.errors)} rejected."
+            )
+
+        importer = UserImporter(batch_size=options["batch_size"], progress=progress)
+        read_error = None
+        try:
+            with open_text(binary) as stream:
+                importer.run(iter_rows(stream, import_format))
+        except READ_ERRORS as exc:
+            read_error = describe_read_error(exc)
+        result = importer.result
+
+        if options["errors"]:
+            with open(options["errors"], "w", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(["line", "email", "error"])
+                for error in result.errors:
+                    writer.writerow([error.line, error.email, error.message])
+        else:
+            for error in result.errors:
+                self.stderr.write(f"line {error.line}: {error.email or '-'}: {error.message}")
+
+        if read_error:
+            raise CommandError(
+                f"{read_error} Stopped after {result.processed} rows; "
+                f"{result.created} users were imported."
+            )
+
+        style = self.style.SUCCESS if not result.errors else self.style.WARNING
+        self.stdout.write(style(f"Imported {result.created} of {result.processed} rows."))
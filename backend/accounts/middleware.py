@@ -1,25 +1,74 @@
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
-from django.shortcuts import redirect
-from django.urls import resolve
+from django.http import HttpResponse, HttpResponseRedirect
+from django.urls import get_script_prefix, reverse
+from django.utils.deprecation import MiddlewareMixin
+
+from .hashers import HashingBusy
 
 
 class MustChangePasswordMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.force_change_url_name = getattr(
+            settings, "FORCE_PASSWORD_CHANGE_URL_NAME", "force-password-change"
+        )
+        self._is_allowed_path = None
+        self._force_change_url = None
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if request.user.is_authenticated and request.user.must_change_password:
-            try:
-                current_view = resolve(request.path_info).view_name
-            except Exception:
-                current_view = ""
-
-            force_change_url_name = getattr(settings, "FORCE_PASSWORD_CHANGE_URL_NAME", "force-password-change")
-            allowed_views = {
-                force_change_url_name,
-                "logout",
-            }
-
-            if current_view not in allowed_views and not request.path_info.startswith("/static/"):
-                return redirect(force_change_url_name)
+        if self._is_async:
+            return self.__acall__(request)
+        if self.must_redirect(request.user, request.path_info):
+            return HttpResponseRedirect(self._force_change_url)
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Resolve the user without a thread hop and hand the result to later code.
+        request.user = await request.auser()
+        if self.must_redirect(request.user, request.path_info):
+            return HttpResponseRedirect(self._force_change_url)
+        return await self.get_response(request)
+
+    def must_redirect(self, user, path):
+        return (
+            user.is_authenticated and user.must_change_password and not self.is_allowed_path(path)
+        )
+
+    def is_allowed_path(self, path):
+        if self._is_allowed_path is None:
+            self._is_allowed_path = self._compile_allowed_paths()
+        return self._is_allowed_path(path) is not None
+
+    def _compile_allowed_paths(self):
+        # Built on first use so the URLconf is loaded; later requests only run the regex.
+        script_prefix = get_script_prefix()
+        self._force_change_url = reverse(self.force_change_url_name)
+        exact_paths = []
+        for url_name in (self.force_change_url_name, "logout"):
+            url = reverse(url_name)
+            if url.startswith(script_prefix):
+                url = "/" + url[len(script_prefix) :]
+            exact_paths.append(re.escape(url) + r"\Z")
+        prefixes = []
+        static_url = settings.STATIC_URL or ""
+        if static_url.startswith("/"):
+            prefixes.append(re.escape(static_url))
+        return re.compile("|".join(exact_paths + prefixes)).match
+
+
+class HashingBusyMiddleware(MiddlewareMixin):
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingBusy):
+            response = HttpResponse("The server is busy. Please try again in a moment.", status=503)
+            response["Retry-After"] = "5"
+            return response
+        return None
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+FTS_TABLE = "accounts_user_fts"
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS accounts_user_email_trgm "
+            "ON accounts_user USING gin (email gin_trgm_ops)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS accounts_user_name_trgm "
+            "ON accounts_user USING gin (name gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(email, name, tokenize='trigram')"
+            )
+        except Exception:
+            # SQLite without FTS5/trigram support keeps the icontains fallback.
+            return
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, email, name) SELECT id, email, name FROM accounts_user"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_name_trgm")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
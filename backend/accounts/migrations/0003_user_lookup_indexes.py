@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+def create_email_ci_index(apps, schema_editor):
+    # email__iexact compiles to UPPER(email) = UPPER(%s) on Postgres and to
+    # email LIKE %s on SQLite, which only a NOCASE index can serve.
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS accounts_user_email_upper_idx "
+            "ON accounts_user (UPPER(email))"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS accounts_user_email_nocase_idx "
+            "ON accounts_user (email COLLATE NOCASE)"
+        )
+
+
+def drop_email_ci_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_upper_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_nocase_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_user_search_indexes"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_staff", True)),
+                fields=["is_active"],
+                name="accounts_user_staff_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["name", "id"], name="accounts_user_name_idx"),
+        ),
+        migrations.RunPython(create_email_ci_index, drop_email_ci_index),
+    ]
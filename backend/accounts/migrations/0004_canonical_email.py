@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def lowercase_emails(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    # Python lowercases non-ASCII letters that SQLite's LOWER() leaves alone, so both
+    # the duplicate check and the update are done here rather than in SQL.
+    seen = set()
+    duplicates = {}
+    changed = []
+    for pk, email in User.objects.values_list("pk", "email").iterator(chunk_size=2000):
+        canonical = email.lower()
+        if canonical in seen:
+            duplicates[canonical] = None
+        seen.add(canonical)
+        if email != canonical:
+            changed.append(User(pk=pk, email=canonical))
+    if duplicates:
+        raise RuntimeError(
+            "These emails belong to several users that differ only by case; merge or rename "
+            f"them before migrating: {', '.join(list(duplicates)[:20])}"
+        )
+
+    User.objects.bulk_update(changed, ["email"], batch_size=1000)
+
+
+def drop_email_ci_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_upper_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_nocase_idx")
+
+
+def create_email_ci_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS accounts_user_email_upper_idx "
+            "ON accounts_user (UPPER(email))"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS accounts_user_email_nocase_idx "
+            "ON accounts_user (email COLLATE NOCASE)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_lookup_indexes"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("email", django.db.models.functions.text.Lower("email"))),
+                name="accounts_user_email_lowercase",
+            ),
+        ),
+        # Exact lookups on the canonical email use the unique index instead.
+        migrations.RunPython(drop_email_ci_index, create_email_ci_index),
+    ]
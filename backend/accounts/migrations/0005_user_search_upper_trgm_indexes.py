@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+def create_upper_trgm_indexes(apps, schema_editor):
+    # email__icontains compiles to UPPER(email::text) LIKE UPPER(%s) on Postgres, which
+    # only a trigram index on that same expression can serve.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_trgm")
+    schema_editor.execute("DROP INDEX IF EXISTS accounts_user_name_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS accounts_user_email_upper_trgm "
+        "ON accounts_user USING gin ((UPPER(email::text)) gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS accounts_user_name_upper_trgm "
+        "ON accounts_user USING gin ((UPPER(name::text)) gin_trgm_ops)"
+    )
+
+
+def create_column_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS accounts_user_email_upper_trgm")
+    schema_editor.execute("DROP INDEX IF EXISTS accounts_user_name_upper_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS accounts_user_email_trgm "
+        "ON accounts_user USING gin (email gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS accounts_user_name_trgm "
+        "ON accounts_user USING gin (name gin_trgm_ops)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_canonical_email"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_upper_trgm_indexes, create_column_trgm_indexes),
+    ]
@@ -1,11 +1,27 @@
+from django.contrib.auth.hashers import verify_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from .hashers import run_hashing
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
 
+    @classmethod
+    def normalize_email(cls, email):
+        """Lowercase the whole address; emails are stored and looked up in this form."""
+        return (email or "").strip().lower()
+
+    def get_by_natural_key(self, username):
+        return self.get(**{self.model.USERNAME_FIELD: self.normalize_email(username)})
+
+    async def aget_by_natural_key(self, username):
+        return await self.aget(**{self.model.USERNAME_FIELD: self.normalize_email(username)})
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("Users must have an email address")
@@ -38,6 +54,21 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            # Admin checks only ever look at staff, a handful of rows.
+            models.Index(
+                fields=["is_active"], condition=Q(is_staff=True), name="accounts_user_staff_idx"
+            ),
+            models.Index(fields=["name", "id"], name="accounts_user_name_idx"),
+        ]
+        constraints = [
+            # Logins and resets look emails up exactly, so they must be stored lowercased.
+            models.CheckConstraint(
+                condition=Q(email=Lower("email")), name="accounts_user_email_lowercase"
+            ),
+        ]
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     EMAIL_FIELD = "email"
@@ -45,6 +76,29 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def clean(self):
+        super().clean()
+        self.email = self.__class__.objects.normalize_email(self.email)
+
     @property
     def is_admin(self):
         return self.is_staff or self.is_superuser
+
+    async def acheck_password(self, raw_password):
+        is_correct, must_update = await run_hashing(verify_password, raw_password, self.password)
+        if is_correct and must_update:
+            await self.aset_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            await self.asave(update_fields=["password"])
+        return is_correct
+
+    async def aset_password(self, raw_password):
+        await run_hashing(self.set_password, raw_password)
+
+    def get_session_auth_hash(self):
+        # Users rebuilt from a cached snapshot carry the hash instead of the password.
+        snapshot_hash = self.__dict__.get("_snapshot_session_auth_hash")
+        if snapshot_hash and "password" in self.get_deferred_fields():
+            return snapshot_hash
+        return super().get_session_auth_hash()
@@ -1,10 +1,35 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.contrib.auth.models import Group
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import redirect
 
+from core.cache_utils import table_version
+from core.instrumentation import record_cache
+
+
+def async_login_required(view_func):
+    @wraps(view_func)
+    async def _wrapped(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+
+    return _wrapped
+
 
 def admin_required(view_func):
+    if iscoroutinefunction(view_func):
+        return _async_admin_required(view_func)
+
     @login_required
     def _wrapped(request, *args, **kwargs):
         if not (request.user.is_active and request.user.is_staff):
@@ -14,6 +39,17 @@ def admin_required(view_func):
     return _wrapped
 
 
+def _async_admin_required(view_func):
+    @async_login_required
+    @wraps(view_func)
+    async def _wrapped(request, *args, **kwargs):
+        if not (request.user.is_active and request.user.is_staff):
+            raise PermissionDenied
+        return await view_func(request, *args, **kwargs)
+
+    return _wrapped
+
+
 class AdminRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_active and self.request.user.is_staff
@@ -22,3 +58,14 @@ class AdminRequiredMixin(UserPassesTestMixin):
         if not self.request.user.is_authenticated:
             return redirect("login")
         raise PermissionDenied
+
+
+def group_choices():
+    """(pk, name) pairs for group pickers, cached per Group table version."""
+    key = f"accounts:group_choices:{table_version(Group)}"
+    choices = cache.get(key)
+    record_cache(hit=choices is not None)
+    if choices is None:
+        choices = list(Group.objects.order_by("name").values_list("pk", "name"))
+        cache.set(key, choices, settings.PERMISSION_CACHE_TIMEOUT)
+    return choices
@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+
+FTS_TABLE = "accounts_user_fts"
+
+
+class IContainsUserSearch:
+    """Fallback search: case-insensitive substring match ordered by email."""
+
+    ordering = ("email", "id")
+
+    def search(self, queryset, query):
+        return (
+            queryset.filter(Q(email__icontains=query) | Q(name__icontains=query)),
+            self.ordering,
+        )
+
+    def index_users(self, users):
+        pass
+
+    def remove_users(self, user_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class PostgresTrigramUserSearch(IContainsUserSearch):
+    """ILIKE served by pg_trgm GIN indexes, ranked by trigram similarity."""
+
+    ranked_ordering = ("-search_rank", "email", "id")
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset, _ = super().search(queryset, query)
+        queryset = queryset.annotate(
+            search_rank=Greatest(
+                TrigramSimilarity("email", query),
+                TrigramSimilarity("name", query),
+            )
+        )
+        return queryset, self.ranked_ordering
+
+
+class SQLiteFTSUserSearch(IContainsUserSearch):
+    """FTS5 trigram shadow table kept in sync with accounts_user by signals.
+
+    Matches where the email or name starts with the query come first. Unlike
+    bm25, which shifts as other rows are indexed, that rank depends only on the
+    row itself, so keyset cursors stay valid while users are added.
+    """
+
+    ranked_ordering = ("-search_rank", "email", "id")
+    min_query_length = 3
+
+    def search(self, queryset, query):
+        if len(query) < self.min_query_length:
+            return super().search(queryset, query)
+        match = '"' + query.replace('"', '""') + '"'
+        matching = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        queryset = queryset.filter(id__in=matching).annotate(
+            search_rank=Case(
+                When(Q(email__istartswith=query) | Q(name__istartswith=query), then=1),
+                default=0,
+                output_field=IntegerField(),
+            )
+        )
+        return queryset, self.ranked_ordering
+
+    def index_users(self, users):
+        rows = [(user.pk, user.email, user.name) for user in users]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, email, name) VALUES (%s, %s, %s)", rows
+            )
+
+    def remove_users(self, user_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in user_ids]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, email, name) "
+                "SELECT id, email, name FROM accounts_user"
+            )
+
+
+def sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+@lru_cache
+def _load_backend(path, vendor):
+    if path != "auto":
+        return import_string(path)()
+    if vendor == "postgresql":
+        return PostgresTrigramUserSearch()
+    if vendor == "sqlite" and sqlite_fts_available():
+        return SQLiteFTSUserSearch()
+    return IContainsUserSearch()
+
+
+def get_user_search_backend():
+    return _load_backend(settings.USER_SEARCH_BACKEND, connection.vendor)
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from core.cache_utils import bump_table_version
+
+from .backends import invalidate_permissions, invalidate_user_snapshots
+from .models import User
+from .search import get_user_search_backend
+
+SEARCH_FIELDS = {"email", "name"}
+
+
+@receiver(post_save, sender=User)
+def index_user_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    get_user_search_backend().index_users([instance])
+
+
+@receiver(post_delete, sender=User)
+def remove_user_from_search(sender, instance, **kwargs):
+    get_user_search_backend().remove_users([instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    invalidate_user_snapshots([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_member_snapshots(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        invalidate_user_snapshots([instance.pk])
+    elif action == "pre_clear":
+        invalidate_user_snapshots(instance.user_set.values_list("pk", flat=True))
+    else:
+        invalidate_user_snapshots(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permission_sets(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_permissions()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_migrate)
+def invalidate_permission_sets(sender, **kwargs):
+    invalidate_permissions()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_list_version(sender, **kwargs):
+    bump_table_version(sender)
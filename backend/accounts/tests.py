@@ -1,8 +1,32 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from importlib import import_module
+from io import StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from core.models import SiteSettings
+from core.models import OutboundEmail, SiteSettings
+
+from .backends import CachedModelBackend, snapshot_key
+from .forms import AdminUserForm, RegistrationForm, SitePasswordResetForm
+from .hashers import HashingBusy, hashing_slot
+from .permissions import group_choices
+from .search import PostgresTrigramUserSearch, get_user_search_backend
 
 User = get_user_model()
 
@@ -16,6 +40,16 @@ class AuthSmokeTests(TestCase):
         )
         self.assertRedirects(response, reverse("dashboard"))
 
+    def test_password_reset_is_queued_for_the_worker(self):
+        User.objects.create_user(email="user@example.com", password="pass-1234")
+        response = self.client.post(reverse("password_reset"), {"email": "user@example.com"})
+        self.assertRedirects(response, reverse("password_reset_done"))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboundEmail.objects.get().to, ["user@example.com"])
+
+        call_command("send_queued_mail", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
 
 class RegistrationToggleTests(TestCase):
     def test_registration_closed_returns_404(self):
@@ -29,7 +63,8 @@ class RegistrationToggleTests(TestCase):
     def test_registration_open_creates_user(self):
         settings = SiteSettings.get_solo()
         settings.registration_enabled = True
-        settings.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
 
         response = self.client.post(
             reverse("register"),
@@ -42,3 +77,446 @@ class RegistrationToggleTests(TestCase):
         )
         self.assertRedirects(response, reverse("login"))
         self.assertTrue(User.objects.filter(email="new@example.com").exists())
+
+
+class MustChangePasswordMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="user@example.com", password="pass-1234", must_change_password=True
+        )
+        self.client.force_login(self.user)
+
+    def test_redirects_other_pages(self):
+        response = self.client.get(reverse("dashboard"))
+        self.assertRedirects(response, reverse("force-password-change"))
+
+    @override_settings(ROOT_URLCONF="config.urls_async")
+    async def test_redirects_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("profile"))
+        self.assertRedirects(
+            response, reverse("force-password-change"), fetch_redirect_response=False
+        )
+
+    def test_allows_force_change_page(self):
+        response = self.client.get(reverse("force-password-change"))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(STATIC_URL="/assets/")
+    def test_static_url_prefix_is_not_redirected(self):
+        response = self.client.get("/assets/app.css")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get("/static/app.css")
+        self.assertRedirects(response, reverse("force-password-change"))
+
+
+@override_settings(USER_CACHE_ENABLED=True)
+class CachedUserBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="staff@example.com", password="pass-1234", is_staff=True
+        )
+        self.client.force_login(self.user)
+        self.client.get(reverse("dashboard"))
+
+    def test_logged_in_page_views_skip_the_user_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse("dashboard")).status_code, 200)
+        self.assertFalse(any("accounts_user" in query["sql"] for query in queries))
+
+    def test_staff_change_is_seen_on_next_request(self):
+        self.assertEqual(self.client.get(reverse("admin-users")).status_code, 200)
+        self.user.is_staff = False
+        self.user.save(update_fields=["is_staff"])
+        self.assertEqual(self.client.get(reverse("admin-users")).status_code, 403)
+
+    def test_password_change_elsewhere_ends_session(self):
+        self.user.set_password("new-pass-5678")
+        self.user.save()
+        response = self.client.get(reverse("dashboard"))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('dashboard')}")
+
+    def test_group_change_invalidates_snapshot(self):
+        key = snapshot_key(self.user.pk)
+        group = Group.objects.create(name="Support")
+        group.user_set.add(self.user)
+        self.assertNotEqual(snapshot_key(self.user.pk), key)
+
+    def test_saving_snapshot_user_keeps_password(self):
+        with self.assertNumQueries(0):
+            user = CachedModelBackend().get_user(self.user.pk)
+        user.name = "Staff"
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "Staff")
+        self.assertTrue(self.user.check_password("pass-1234"))
+
+
+@override_settings(USER_CACHE_ENABLED=True)
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="member@example.com", password="pass-1234")
+        self.group = Group.objects.create(name="Editors")
+        self.permission = Permission.objects.get(codename="change_group")
+        self.group.permissions.add(self.permission)
+        self.user.groups.add(self.group)
+
+    def _fresh_user(self):
+        return CachedModelBackend().get_user(self.user.pk)
+
+    def test_permission_set_is_cached_across_requests(self):
+        self.assertTrue(self._fresh_user().has_perm("auth.change_group"))
+        with self.assertNumQueries(0):
+            self.assertTrue(self._fresh_user().has_perm("auth.change_group"))
+
+    def test_group_permission_change_invalidates(self):
+        self.assertTrue(self._fresh_user().has_perm("auth.change_group"))
+        self.group.permissions.remove(self.permission)
+        self.assertFalse(self._fresh_user().has_perm("auth.change_group"))
+
+    def test_membership_change_invalidates(self):
+        self.assertTrue(self._fresh_user().has_perm("auth.change_group"))
+        self.group.user_set.clear()
+        self.assertFalse(self._fresh_user().has_perm("auth.change_group"))
+
+    def test_group_catalog_is_cached_until_groups_change(self):
+        self.assertEqual(group_choices(), [(self.group.pk, "Editors")])
+        with self.assertNumQueries(0):
+            AdminUserForm().as_div()
+        other = Group.objects.create(name="Billing")
+        self.assertEqual(group_choices(), [(other.pk, "Billing"), (self.group.pk, "Editors")])
+
+
+class MultiWorkerUserCacheTests(TestCase):
+    """Two workers, each with its own local-memory cache, as under gunicorn or uvicorn."""
+
+    def setUp(self):
+        self.workers = [LocMemCache(f"worker-{index}", {}) for index in range(2)]
+        self.user = User.objects.create_user(email="staff@example.com", is_staff=True)
+        self.group = Group.objects.create(name="Editors")
+        self.group.permissions.add(Permission.objects.get(codename="change_group"))
+        self.user.groups.add(self.group)
+
+    @contextmanager
+    def worker(self, index):
+        worker_cache = self.workers[index]
+        with (
+            mock.patch("accounts.backends.cache", worker_cache),
+            mock.patch("core.cache_utils.cache", worker_cache),
+        ):
+            yield
+
+    def can_edit_groups(self, index):
+        """Whether worker ``index`` still lets the user in with the group permission."""
+        with self.worker(index):
+            user = CachedModelBackend().get_user(self.user.pk)
+            return user is not None and user.has_perm("auth.change_group")
+
+    def test_process_local_cache_does_not_serve_stale_users(self):
+        self.assertFalse(django_settings.USER_CACHE_ENABLED)
+        self.assertTrue(self.can_edit_groups(0))
+        self.assertTrue(self.can_edit_groups(1))
+        with self.worker(0):
+            self.group.user_set.remove(self.user)
+        self.assertFalse(self.can_edit_groups(1))
+        with self.worker(0):
+            self.group.user_set.add(self.user)
+            self.user.is_active = False
+            self.user.save()
+        self.assertFalse(self.can_edit_groups(1))
+
+    @override_settings(USER_CACHE_ENABLED=True)
+    def test_shared_cache_invalidates_every_worker(self):
+        self.workers[1] = self.workers[0]
+        self.assertTrue(self.can_edit_groups(1))
+        with self.worker(0):
+            self.group.user_set.remove(self.user)
+        self.assertFalse(self.can_edit_groups(1))
+
+
+@override_settings(PASSWORD_HASHING_CONCURRENCY=1, PASSWORD_HASHING_QUEUE_TIMEOUT=0.05)
+class PasswordHashingPoolTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="member@example.com", password="pass-1234")
+
+    def _hold_slot(self):
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold():
+            with hashing_slot():
+                acquired.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        acquired.wait(5)
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+
+    def test_verify_reuses_the_slot_it_holds(self):
+        self.assertTrue(self.user.check_password("pass-1234"))
+
+    def test_busy_pool_rejects_login_with_503(self):
+        self._hold_slot()
+        with self.assertRaises(HashingBusy):
+            self.user.check_password("pass-1234")
+        response = self.client.post(
+            reverse("login"), {"username": "member@example.com", "password": "pass-1234"}
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+    def test_async_check_runs_on_the_pool(self):
+        self.assertTrue(async_to_sync(self.user.acheck_password)("pass-1234"))
+        self.assertFalse(async_to_sync(self.user.acheck_password)("wrong"))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=100000)
+    def test_iteration_change_upgrades_hash_on_login(self):
+        self.assertTrue(self.user.check_password("pass-1234"))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$100000$"))
+
+
+@override_settings(LOGIN_RATE_LIMIT_PER_IP=3, LOGIN_RATE_LIMIT_PER_EMAIL=2)
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(email="member@example.com", password="pass-1234")
+
+    def login(self, email, password="wrong", **extra):
+        return self.client.post(
+            reverse("login"), {"username": email, "password": password}, **extra
+        )
+
+    def test_email_limit_rejects_before_authenticating(self):
+        self.assertEqual(self.login("member@example.com").status_code, 200)
+        self.assertEqual(self.login(" Member@Example.com").status_code, 200)
+        with mock.patch("django.contrib.auth.forms.authenticate") as authenticate:
+            response = self.login("member@example.com", password="pass-1234")
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertContains(response, "Too many attempts", status_code=429)
+
+    def test_ip_limit_covers_every_email(self):
+        for index in range(3):
+            self.assertEqual(self.login(f"user{index}@example.com").status_code, 200)
+        self.assertEqual(self.login("member@example.com").status_code, 429)
+        self.assertEqual(
+            self.login("member@example.com", "pass-1234", REMOTE_ADDR="10.0.0.2").status_code, 302
+        )
+
+    @override_settings(RATE_LIMIT_TRUSTED_PROXIES=1)
+    def test_trusted_proxy_forwarded_address_is_used(self):
+        for index in range(3):
+            self.login(f"user{index}@example.com", HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.0.9")
+        response = self.login("member@example.com", HTTP_X_FORWARDED_FOR="10.0.0.9")
+        self.assertEqual(response.status_code, 429)
+        response = self.login("member@example.com", HTTP_X_FORWARDED_FOR="10.0.0.10")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PASSWORD_RESET_RATE_LIMIT_PER_EMAIL=1)
+    def test_password_reset_limit_stops_queueing_mail(self):
+        response = self.client.post(reverse("password_reset"), {"email": "member@example.com"})
+        self.assertRedirects(response, reverse("password_reset_done"))
+        response = self.client.post(reverse("password_reset"), {"email": "member@example.com"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_limits_can_be_disabled(self):
+        for _ in range(4):
+            self.assertEqual(self.login("member@example.com").status_code, 200)
+
+
+class UserImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name="Support")
+        User.objects.create_user(email="taken@example.com")
+
+    def run_import(self, content, suffix=".csv", *args):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False) as handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        out, err = StringIO(), StringIO()
+        call_command("import_users", handle.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_rows_are_created_in_batches_without_hashing(self):
+        content = (
+            "Email,Name,is_staff,groups\n"
+            "one@example.com,One,,Support\n"
+            "two@example.com,Two,yes,\n"
+            "three@example.com,Three,,\n"
+        )
+        with (
+            mock.patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.encode") as encode,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            out, err = self.run_import(content, ".csv", "--batch-size", "2")
+        encode.assert_not_called()
+        self.assertIn("Processed 2 rows: 2 created", out)
+        self.assertIn("Imported 3 of 3 rows.", out)
+        self.assertEqual(err, "")
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "accounts_user"')]
+        self.assertEqual(len(inserts), 2)
+
+        one = User.objects.get(email="one@example.com")
+        self.assertFalse(one.has_usable_password())
+        self.assertTrue(one.must_change_password)
+        self.assertEqual(list(one.groups.all()), [self.group])
+        self.assertTrue(User.objects.get(email="two@example.com").is_staff)
+
+    def test_rejected_rows_are_reported_per_line(self):
+        content = (
+            '{"email": "new@example.com", "groups": ["Support"]}\n'
+            '{"email": "taken@example.com"}\n'
+            '{"email": "new@example.com"}\n'
+            "not json\n"
+            '{"email": "x@example.com", "groups": ["Missing"]}\n'
+            '{"email": "y@example.com", "is_active": "maybe"}\n'
+        )
+        out, err = self.run_import(content, ".jsonl")
+        self.assertIn("Imported 1 of 6 rows.", out)
+        self.assertIn("line 2: taken@example.com: User already exists.", err)
+        self.assertIn("line 3: new@example.com: Duplicate email in this file.", err)
+        self.assertIn("line 4: -: Invalid JSON", err)
+        self.assertIn("line 5: x@example.com: Unknown group 'Missing'.", err)
+        self.assertIn("line 6: y@example.com: 'maybe' is not a boolean.", err)
+
+    def test_unreadable_file_stops_with_the_rows_imported_so_far(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as handle:
+            # Longer than csv.field_size_limit().
+            handle.write(b"email\none@example.com\n" + b"x" * 200_000 + b"\n")
+        self.addCleanup(os.unlink, handle.name)
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "The file is not valid CSV"):
+            call_command("import_users", handle.name, "--batch-size", "1", stdout=out)
+        self.assertIn("Processed 1 rows: 1 created", out.getvalue())
+        self.assertTrue(User.objects.filter(email="one@example.com").exists())
+
+    def test_imported_users_are_searchable_and_listed(self):
+        admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        self.client.force_login(admin)
+        self.client.get(reverse("admin-users"))
+        self.run_import("email,name\nfreshly@example.com,Freshly Imported\n")
+
+        backend = get_user_search_backend()
+        queryset, _ordering = backend.search(User.objects.all(), "Freshly")
+        self.assertEqual([user.email for user in queryset], ["freshly@example.com"])
+        response = self.client.get(reverse("admin-users"))
+        self.assertContains(response, "freshly@example.com")
+
+
+class UserIndexPlanTests(TestCase):
+    EMAIL_INDEX = {
+        # The unique index or its varchar_pattern_ops twin, both plain btrees on email.
+        "postgresql": "accounts_user_email_",
+        "sqlite": "sqlite_autoindex_accounts_user_1",
+    }
+
+    def setUp(self):
+        if connection.vendor not in self.EMAIL_INDEX:
+            self.skipTest("Index plans are checked on SQLite and Postgres.")
+        if connection.vendor == "postgresql":
+            # The test table is tiny; make the planner show which index it would use.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for index in range(20):
+            User.objects.create_user(
+                email=f"user{index}@example.com", name=f"User {index}", is_staff=index < 2
+            )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        return plan
+
+    def assertNotSorted(self, plan):
+        # SQLite's "USE TEMP B-TREE FOR ORDER BY" or a full Postgres "Sort" node. Postgres
+        # may add an "Incremental Sort" on id over the email index, which only ever sees
+        # one row per email.
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertNotRegex(plan, r"^Sort |->  Sort ")
+
+    def test_admin_checks_use_the_partial_staff_index(self):
+        # ensure_initial_admin and the last-admin check.
+        self.assertUsesIndex(
+            User.objects.filter(is_staff=True, is_active=True).values("pk")[:1],
+            "accounts_user_staff_idx",
+        )
+        self.assertUsesIndex(
+            User.objects.filter(is_staff=True).exclude(pk__in=[1]), "accounts_user_staff_idx"
+        )
+
+    def test_login_and_reset_lookups_use_the_email_index(self):
+        self.assertUsesIndex(
+            User.objects.filter(email=User.objects.normalize_email(" USER1@Example.com")),
+            self.EMAIL_INDEX[connection.vendor],
+        )
+
+    def test_user_list_orderings_read_an_index_in_order(self):
+        plan = User.objects.order_by("email", "id")[:25].explain()
+        self.assertNotSorted(plan)
+        plan = self.assertUsesIndex(
+            User.objects.order_by("name", "id")[:25], "accounts_user_name_idx"
+        )
+        self.assertNotSorted(plan)
+
+    def test_postgres_search_uses_the_trigram_indexes(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("Trigram indexes only exist on Postgres.")
+        queryset, _ordering = PostgresTrigramUserSearch().search(User.objects.all(), "user1")
+        plan = self.assertUsesIndex(queryset, "accounts_user_email_upper_trgm")
+        self.assertIn("accounts_user_name_upper_trgm", plan)
+
+
+class CanonicalEmailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_emails_are_stored_lowercased(self):
+        user = User.objects.create_user(email="Mixed.Case@Example.COM", password="pass-1234")
+        self.assertEqual(user.email, "mixed.case@example.com")
+        self.assertEqual(User.objects.get_by_natural_key(" MIXED.case@example.com"), user)
+
+    def test_login_ignores_email_case(self):
+        User.objects.create_user(email="user@example.com", password="pass-1234")
+        response = self.client.post(
+            reverse("login"), {"username": "User@Example.com", "password": "pass-1234"}
+        )
+        self.assertRedirects(response, reverse("dashboard"))
+
+    def test_password_reset_ignores_email_case(self):
+        User.objects.create_user(email="user@example.com", password="pass-1234")
+        with self.assertNumQueries(1):
+            users = list(SitePasswordResetForm().get_users("USER@example.com"))
+        self.assertEqual([user.email for user in users], ["user@example.com"])
+
+    def test_forms_reject_emails_differing_only_by_case(self):
+        User.objects.create_user(email="taken@example.com")
+        form = RegistrationForm(
+            {
+                "email": "Taken@Example.com",
+                "name": "",
+                "password1": "pass-1234",
+                "password2": "pass-1234",
+            }
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("email", form.errors)
+
+    def test_database_rejects_uppercase_emails(self):
+        with self.assertRaises(IntegrityError):
+            User.objects.bulk_create([User(email="Bulk@example.com")])
+
+    @skipUnless(connection.vendor == "sqlite", "Postgres LOWER() folds non-ASCII letters.")
+    def test_migration_refuses_non_ascii_emails_differing_only_by_case(self):
+        # SQLite's LOWER() is ASCII-only, so the check constraint lets these through.
+        User.objects.bulk_create([User(email="ève@example.com"), User(email="Ève@example.com")])
+        migration = import_module("accounts.migrations.0004_canonical_email")
+        with self.assertRaisesMessage(RuntimeError, "ève@example.com"):
+            migration.lowercase_emails(django_apps, None)
@@ -0,0 +1,85 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.metrics import record_throttled
+
+
+def client_ip(request):
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [
+            part.strip()
+            for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if part.strip()
+        ]
+        # Each trusted proxy appends the address it saw; anything further left is client-supplied.
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def normalize_email(value):
+    return (value or "").strip().lower()
+
+
+class Throttle:
+    """Sliding-window limits per client IP and per email, counted in the cache.
+
+    The count for the last ``window`` seconds is the current fixed window plus the
+    previous one weighted by how much of it still overlaps, which needs only an
+    atomic ``incr`` from the cache backend. Limits are read from
+    ``<PREFIX>_RATE_LIMIT_PER_IP``, ``_PER_EMAIL`` and ``_WINDOW``.
+    """
+
+    def __init__(self, scope, setting_prefix):
+        self.scope = scope
+        self.setting_prefix = setting_prefix
+
+    def _setting(self, name):
+        return getattr(settings, f"{self.setting_prefix}_RATE_LIMIT_{name}")
+
+    def check(self, request, email=""):
+        """Record an attempt and return 0, or the seconds to wait if it is over a limit."""
+        if not settings.RATE_LIMIT_ENABLED:
+            return 0
+        cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+        window = self._setting("WINDOW")
+        now = time.time()
+        current_window = int(now // window)
+        overlap = 1 - (now % window) / window
+
+        buckets = [("ip", client_ip(request), self._setting("PER_IP"))]
+        email = normalize_email(email)
+        if email:
+            buckets.append(("email", email, self._setting("PER_EMAIL")))
+        keys = {}
+        for kind, identity, limit in buckets:
+            if limit <= 0:
+                continue
+            digest = hashlib.sha256(identity.encode()).hexdigest()[:32]
+            base = f"throttle:{self.scope}:{kind}:{digest}"
+            keys[kind] = (f"{base}:{current_window}", f"{base}:{current_window - 1}", limit)
+
+        counts = cache.get_many([key for pair in keys.values() for key in pair[:2]])
+        for kind, (current_key, previous_key, limit) in keys.items():
+            weighted = counts.get(previous_key, 0) * overlap + counts.get(current_key, 0)
+            if weighted >= limit:
+                record_throttled(self.scope, kind)
+                return max(1, math.ceil(window - now % window))
+
+        for current_key, _previous_key, _limit in keys.values():
+            # add() is a no-op when the key exists, so concurrent first hits don't reset it.
+            cache.add(current_key, 0, timeout=window * 2)
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, timeout=window * 2)
+        return 0
+
+
+login_throttle = Throttle("login", "LOGIN")
+password_reset_throttle = Throttle("password_reset", "PASSWORD_RESET")
@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth import views as auth_views
@@ -6,6 +7,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 
+from core.context_processors import aprime_context
 from core.models import SiteSettings
 
 from .forms import (
@@ -15,11 +17,44 @@ from .forms import (
     SitePasswordResetForm,
     TailwindPasswordChangeForm,
 )
+from .permissions import async_login_required
+from .throttling import login_throttle, password_reset_throttle
 
+THROTTLED_MESSAGE = "Too many attempts. Please wait a few minutes and try again."
 
-class CustomLoginView(auth_views.LoginView):
+
+class ThrottledFormMixin:
+    """Reject POSTs over the rate limit before the form runs (and hashes or sends mail)."""
+
+    throttle = None
+    email_field = "email"
+
+    def post(self, request, *args, **kwargs):
+        retry_after = self.throttle.check(request, request.POST.get(self.email_field, ""))
+        if retry_after:
+            messages.error(request, THROTTLED_MESSAGE)
+            response = self.render_to_response(
+                self.get_context_data(
+                    form=self.get_form_class()(**self.get_throttled_form_kwargs())
+                ),
+                status=429,
+            )
+            response["Retry-After"] = str(retry_after)
+            return response
+        return super().post(request, *args, **kwargs)
+
+    def get_throttled_form_kwargs(self):
+        return {}
+
+
+class CustomLoginView(ThrottledFormMixin, auth_views.LoginView):
     template_name = "accounts/login.html"
     authentication_form = LoginForm
+    throttle = login_throttle
+    email_field = "username"
+
+    def get_throttled_form_kwargs(self):
+        return {"request": self.request}
 
     def form_valid(self, form):
         response = super().form_valid(form)
@@ -45,6 +80,21 @@ def profile(request):
     return render(request, "accounts/profile.html", {"form": form})
 
 
+@async_login_required
+async def aprofile(request):
+    await aprime_context(request)
+    if request.method == "POST":
+        form = ProfileForm(request.POST, instance=request.user)
+        # Validation checks email uniqueness, which the form only does synchronously.
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(form.save)()
+            messages.success(request, "Profile updated.")
+            return redirect("profile")
+    else:
+        form = ProfileForm(instance=request.user)
+    return render(request, "accounts/profile.html", {"form": form})
+
+
 def register(request):
     settings = SiteSettings.get_solo()
     if not settings.registration_enabled:
@@ -98,12 +148,13 @@ class CustomPasswordChangeDoneView(LoginRequiredMixin, auth_views.PasswordChange
     template_name = "registration/password_change_done.html"
 
 
-class CustomPasswordResetView(auth_views.PasswordResetView):
+class CustomPasswordResetView(ThrottledFormMixin, auth_views.PasswordResetView):
     template_name = "registration/password_reset_form.html"
     email_template_name = "registration/password_reset_email.html"
     subject_template_name = "registration/password_reset_subject.txt"
     success_url = reverse_lazy("password_reset_done")
     form_class = SitePasswordResetForm
+    throttle = password_reset_throttle
 
 
 class CustomPasswordResetDoneView(auth_views.PasswordResetDoneView):
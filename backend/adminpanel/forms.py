@@ -4,6 +4,7 @@ from django import forms
 from django.conf import settings as django_settings
 from django.contrib.auth.models import Group
 
+from accounts.permissions import group_choices
 from core.forms import apply_tailwind_classes
 from core.models import SiteSettings
 
@@ -70,3 +71,52 @@ class GroupForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         apply_tailwind_classes(self)
+
+
+class UserImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or JSON Lines.")
+    format = forms.ChoiceField(
+        choices=[("", "Detect from file name"), ("csv", "CSV"), ("jsonl", "JSON Lines")],
+        required=False,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        apply_tailwind_classes(self)
+
+
+class UserIdsField(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return sorted({int(item) for item in value or []})
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid user selection.") from None
+
+
+class UserBulkActionForm(forms.Form):
+    ACTION_CHOICES = [
+        ("", "Bulk action"),
+        ("activate", "Activate"),
+        ("deactivate", "Deactivate"),
+        ("grant_admin", "Make admin"),
+        ("revoke_admin", "Remove admin"),
+        ("add_group", "Add to group"),
+        ("reset_password", "Send password reset"),
+    ]
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    group = forms.TypedChoiceField(coerce=int, required=False, empty_value=None)
+    user_ids = UserIdsField(error_messages={"required": "Select at least one user."})
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["group"].choices = [("", "Group")] + list(group_choices())
+        apply_tailwind_classes(self)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("action") == "add_group" and not cleaned_data.get("group"):
+            self.add_error("group", "Choose a group.")
+        return cleaned_data
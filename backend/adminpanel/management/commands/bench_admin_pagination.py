@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from core.benchmarking import format_summary, measure, rolled_back, seed_users
+from core.pagination import NEXT, KeysetPaginator
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare deep-page latency of OFFSET pagination and keyset pagination."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--per-page", type=int, default=25)
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        per_page = options["per_page"]
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['users']} users (rolled back afterwards)...")
+            seed_users(options["users"])
+            users = User.objects.all()
+            total = users.count()
+
+            for fraction in (0.0, 0.5, 0.99):
+                position = int(total * fraction)
+                page_number = position // per_page + 1
+                paginator = KeysetPaginator(users, ("email", "id"), per_page)
+                boundary = users.order_by("email", "id")[max(position - 1, 0)]
+                cursor = paginator.encode_cursor(boundary, NEXT) if position else None
+
+                def offset_page():
+                    page = Paginator(users.order_by("email", "id"), per_page).page(page_number)
+                    list(page.object_list)
+
+                def keyset_page():
+                    paginator.get_page(cursor)
+
+                label = f"page {page_number}"
+                self.stdout.write(
+                    format_summary(f"offset {label}", measure(offset_page, options["iterations"]))
+                )
+                self.stdout.write(
+                    format_summary(f"keyset {label}", measure(keyset_page, options["iterations"]))
+                )
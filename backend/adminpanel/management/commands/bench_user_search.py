@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from accounts.search import IContainsUserSearch, get_user_search_backend
+from core.benchmarking import format_summary, measure, rolled_back, seed_users
+from core.pagination import KeysetPaginator
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare admin user search latency of the indexed backend and icontains."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500_000)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--query", action="append", dest="queries")
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or ["bench0123456", "User 4242", "nomatch-xyz"]
+        backends = [("icontains", IContainsUserSearch()), ("indexed", get_user_search_backend())]
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['users']} users (rolled back afterwards)...")
+            seed_users(options["users"])
+            backends[1][1].rebuild()
+            self.stdout.write(f"Indexed backend: {type(backends[1][1]).__name__}")
+
+            for query in queries:
+                for label, backend in backends:
+
+                    def search():
+                        users, ordering = backend.search(User.objects.all(), query)
+                        KeysetPaginator(users, ordering, 25).get_page()
+
+                    samples = measure(search, options["iterations"])
+                    self.stdout.write(format_summary(f"{label} {query!r}", samples))
@@ -1,7 +1,24 @@
+import csv
+import gc
+import json
+import sys
+from unittest import mock
+
+from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
+from accounts.bulk_actions import add_to_group, remaining_active_admins, set_flag
+from accounts.exporting import iter_export_rows
+from core.cache_utils import table_version
+from core.models import OutboundEmail
+
 User = get_user_model()
 
 
@@ -19,7 +36,387 @@ class AdminPermissionsTests(TestCase):
         response = self.client.get(reverse("admin-settings"))
         self.assertEqual(response.status_code, 403)
 
+    @override_settings(ROOT_URLCONF="config.urls_async")
+    async def test_async_user_list_requires_staff(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("admin-users"))
+        self.assertEqual(response.status_code, 403)
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(reverse("admin-users"))
+        self.assertEqual(response.status_code, 200)
+
     def test_admin_settings_allows_staff(self):
         self.client.login(email="admin@example.com", password="pass-1234")
         response = self.client.get(reverse("admin-settings"))
         self.assertEqual(response.status_code, 200)
+
+
+class AdminListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="pass-1234",
+            is_staff=True,
+        )
+        self.client.force_login(self.admin)
+
+    def test_user_list_cursor_links_work_in_htmx_partial(self):
+        for index in range(30):
+            User.objects.create_user(email=f"user{index:02d}@example.com")
+
+        response = self.client.get(reverse("admin-users"), HTTP_HX_REQUEST="true")
+        self.assertTemplateUsed(response, "admin/partials/user_table.html")
+        page = response.context["page_obj"]
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(
+            reverse("admin-users"), {"cursor": page.next_cursor}, HTTP_HX_REQUEST="true"
+        )
+        emails = [user.email for user in response.context["page_obj"]]
+        self.assertEqual(emails, [f"user{index:02d}@example.com" for index in range(24, 30)])
+        self.assertTrue(response.context["page_obj"].has_previous)
+
+    def test_user_list_sorts_by_name(self):
+        User.objects.create_user(email="a@example.com", name="Zed")
+        User.objects.create_user(email="z@example.com", name="Amy")
+
+        response = self.client.get(reverse("admin-users"), {"sort": "name"})
+        names = [user.name for user in response.context["page_obj"]]
+        self.assertEqual(names, ["", "Amy", "Zed"])
+        self.assertContains(response, "sort=name")
+
+    def test_user_search_tracks_saves_and_deletes(self):
+        user = User.objects.create_user(email="findme@example.com", name="Original Name")
+
+        response = self.client.get(reverse("admin-users"), {"q": "findme"})
+        self.assertEqual([u.email for u in response.context["page_obj"]], ["findme@example.com"])
+
+        user.email = "renamed@example.com"
+        user.save()
+        response = self.client.get(reverse("admin-users"), {"q": "findme"})
+        self.assertEqual(list(response.context["page_obj"]), [])
+        response = self.client.get(reverse("admin-users"), {"q": "ORIGINAL"})
+        self.assertEqual([u.email for u in response.context["page_obj"]], ["renamed@example.com"])
+
+        user.delete()
+        response = self.client.get(reverse("admin-users"), {"q": "renamed"})
+        self.assertEqual(list(response.context["page_obj"]), [])
+
+    def test_ranked_search_results_paginate(self):
+        for index in range(30):
+            User.objects.create_user(email=f"match{index:02d}@example.com")
+        User.objects.create_user(email="other@example.com")
+
+        seen = []
+        cursor = ""
+        while True:
+            response = self.client.get(reverse("admin-users"), {"q": "match", "cursor": cursor})
+            page = response.context["page_obj"]
+            seen.extend(user.email for user in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(sorted(seen), [f"match{index:02d}@example.com" for index in range(30)])
+
+    def test_ranked_search_cursor_survives_new_matches(self):
+        for index in range(30):
+            User.objects.create_user(email=f"x{index:02d}match@example.com")
+        User.objects.create_user(email="someone@example.com", name="Matching Name")
+
+        response = self.client.get(reverse("admin-users"), {"q": "match"})
+        page = response.context["page_obj"]
+        first = [user.email for user in page]
+        # Prefix matches rank first.
+        self.assertEqual(first[0], "someone@example.com")
+
+        # New rows would shift bm25 scores, but the rank depends only on each row.
+        for index in range(5):
+            User.objects.create_user(email=f"y{index}match@example.com")
+        response = self.client.get(
+            reverse("admin-users"), {"q": "match", "cursor": page.next_cursor}
+        )
+        second = [user.email for user in response.context["page_obj"]]
+        self.assertEqual(
+            second,
+            [f"x{index:02d}match@example.com" for index in range(24, 30)]
+            + [f"y{index}match@example.com" for index in range(5)],
+        )
+
+    def test_estimated_count_is_labelled(self):
+        with mock.patch("core.pagination.estimated_table_count", return_value=123456):
+            response = self.client.get(reverse("admin-users"), HTTP_HX_REQUEST="true")
+        self.assertContains(response, "About 123456 users")
+
+        response = self.client.get(reverse("admin-users"), {"q": "admin"}, HTTP_HX_REQUEST="true")
+        self.assertContains(response, "1 user<")
+        self.assertNotContains(response, "About")
+
+    @mock.patch("adminpanel.views.time.time", return_value=1_000_000.0)
+    def test_unchanged_htmx_page_returns_not_modified(self, _time):
+        url = reverse("admin-users")
+        response = self.client.get(url, {"q": "Admin"}, HTTP_HX_REQUEST="true")
+        etag = response["ETag"]
+        self.assertIn("HX-Request", response["Vary"])
+
+        response = self.client.get(
+            url, {"q": "admin "}, HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertTemplateNotUsed(response, "admin/partials/user_table.html")
+
+        User.objects.create_user(email="new-admin@example.com")
+        response = self.client.get(
+            url, {"q": "admin"}, HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["page_obj"]), 2)
+
+    def test_etag_expires_with_a_process_local_cache(self):
+        url = reverse("admin-users")
+        with mock.patch("adminpanel.views.time.time", return_value=1_000_000.0):
+            etag = self.client.get(url, HTTP_HX_REQUEST="true")["ETag"]
+        # A write in another worker wouldn't bump this process's version; the page still
+        # gets re-rendered once the result cache TTL has passed.
+        later = 1_000_000.0 + django_settings.ADMIN_LIST_RESULT_CACHE_TTL
+        with mock.patch("adminpanel.views.time.time", return_value=later):
+            response = self.client.get(url, HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEFAULT_CACHE_IS_SHARED=True)
+    def test_etag_follows_only_the_version_with_a_shared_cache(self):
+        url = reverse("admin-users")
+        with mock.patch("adminpanel.views.time.time", return_value=1_000_000.0):
+            etag = self.client.get(url, HTTP_HX_REQUEST="true")["ETag"]
+        with mock.patch("adminpanel.views.time.time", return_value=2_000_000.0):
+            response = self.client.get(url, HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_searches_differing_beyond_case_are_cached_separately(self):
+        User.objects.create_user(email="strasse@example.com")
+        url = reverse("admin-users")
+        response = self.client.get(url, {"q": "strasse"}, HTTP_HX_REQUEST="true")
+        self.assertEqual(len(response.context["page_obj"]), 1)
+        response = self.client.get(
+            url, {"q": "Straße"}, HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["page_obj"]), 0)
+
+
+class AdminUserImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        self.client.force_login(self.admin)
+
+    def test_upload_imports_rows_and_lists_errors(self):
+        upload = SimpleUploadedFile(
+            "users.csv", b"email,name\nnew@example.com,New\nadmin@example.com,Dup\n"
+        )
+        response = self.client.post(reverse("admin-user-import"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "1 of 2 rows imported, 1 rejected.")
+        self.assertContains(response, "User already exists.")
+        self.assertTrue(User.objects.filter(email="new@example.com").exists())
+
+    def test_non_utf8_upload_is_a_form_error(self):
+        upload = SimpleUploadedFile("users.csv", b"email\n\xff\xfe@example.com\n")
+        response = self.client.post(reverse("admin-user-import"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "The file is not valid UTF-8. Stopped after 0 rows.")
+        self.assertEqual(User.objects.count(), 1)
+
+
+class AdminUserExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        self.client.force_login(self.admin)
+
+    def test_csv_export_honors_search_and_lists_groups(self):
+        staff = Group.objects.create(name="Staff")
+        support = Group.objects.create(name="Support")
+        alice = User.objects.create_user(email="alice@example.com", name="Alice")
+        alice.groups.set([support, staff])
+        User.objects.create_user(email="bob@example.com", name="Bob")
+
+        response = self.client.get(reverse("admin-user-export"), {"q": "alice"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="users.csv"')
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(
+            rows[0], ["id", "email", "name", "is_active", "is_staff", "date_joined", "groups"]
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1:5], ["alice@example.com", "Alice", "True", "False"])
+        self.assertEqual(rows[1][6], "Staff;Support")
+
+    def test_csv_export_escapes_formulas(self):
+        Group.objects.create(name="-Ops")
+        user = User.objects.create_user(email="formula@example.com", name='=HYPERLINK("x")')
+        user.groups.set(Group.objects.all())
+        response = self.client.get(reverse("admin-user-export"), {"q": "formula"})
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[1][2], '\'=HYPERLINK("x")')
+        self.assertEqual(rows[1][6], "'-Ops")
+
+        response = self.client.get(
+            reverse("admin-user-export"), {"q": "formula", "format": "jsonl"}
+        )
+        record = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(record["name"], '=HYPERLINK("x")')
+
+    def test_group_names_are_fetched_once_per_chunk(self):
+        group = Group.objects.create(name="Staff")
+        for index in range(5):
+            User.objects.create_user(email=f"user{index}@example.com").groups.add(group)
+        rows = iter_export_rows(User.objects.all(), ("email", "id"), chunk_size=2)
+        # One cursor over the users, fetched in three chunks, and one membership query each.
+        with self.assertNumQueries(4):
+            exported = list(rows)
+        self.assertEqual(len(exported), 6)
+        self.assertEqual([row[6] for row in exported], [[]] + [["Staff"]] * 5)
+
+    def test_jsonl_export(self):
+        response = self.client.get(reverse("admin-user-export"), {"format": "jsonl"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [
+            json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual([record["email"] for record in records], ["admin@example.com"])
+        self.assertEqual(records[0]["groups"], [])
+
+    async def test_asgi_export_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(reverse("admin-user-export"))
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b"admin@example.com", body)
+
+    def test_memory_stays_bounded_at_500k_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO accounts_user (
+                    password, is_superuser, email, name, is_active, is_staff,
+                    must_change_password, date_joined
+                )
+                WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s)
+                SELECT '!', FALSE, 'export' || n || '@example.com', 'Export User ' || n,
+                    TRUE, FALSE, FALSE, CURRENT_TIMESTAMP
+                FROM seq
+                """,
+                [500_000],
+            )
+        response = self.client.get(reverse("admin-user-export"))
+
+        # Sampling allocated blocks per chunk is cheap, unlike tracing every allocation.
+        chunks = iter(response.streaming_content)
+        next(chunks)  # header
+        gc.collect()
+        baseline = sys.getallocatedblocks()
+        peak = baseline
+        lines = 0
+        for chunk in chunks:
+            lines += chunk.count(b"\n")
+            peak = max(peak, sys.getallocatedblocks())
+        self.assertEqual(lines, 500_000 + 1)  # seeded users and the admin
+        # Holding all rows would take millions of blocks; one chunk takes tens of thousands.
+        self.assertLess(peak - baseline, 100_000)
+
+
+class AdminUserBulkActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        self.one = User.objects.create_user(email="one@example.com", password="pass-1234")
+        self.two = User.objects.create_user(email="two@example.com")
+        self.client.force_login(self.admin)
+
+    def post(self, action, users, **extra):
+        data = {"action": action, "user_ids": [user.pk for user in users], **extra}
+        return self.client.post(reverse("admin-user-bulk"), data)
+
+    def test_requires_staff(self):
+        self.client.force_login(self.one)
+        response = self.post("deactivate", [self.two])
+        self.assertEqual(response.status_code, 403)
+        self.two.refresh_from_db()
+        self.assertTrue(self.two.is_active)
+
+    def test_deactivate_updates_selected_users(self):
+        response = self.post("deactivate", [self.one, self.two], q="example")
+        self.assertRedirects(response, reverse("admin-users") + "?q=example")
+        self.assertEqual(User.objects.filter(is_active=False).count(), 2)
+        self.assertTrue(User.objects.get(pk=self.admin.pk).is_active)
+
+    def test_flags_change_with_one_update(self):
+        version = table_version(User)
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(set_flag([self.one.pk, self.two.pk], "is_staff", True), 2)
+            # Caches are only invalidated once the update commits.
+            self.assertEqual(table_version(User), version)
+        self.assertNotEqual(table_version(User), version)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 3)
+
+    def test_last_admin_cannot_be_removed_or_deactivated(self):
+        for action in ("revoke_admin", "deactivate"):
+            response = self.post(action, [self.admin, self.one])
+            self.assertRedirects(response, reverse("admin-users"))
+        self.admin.refresh_from_db()
+        self.assertTrue(self.admin.is_staff and self.admin.is_active)
+        self.one.refresh_from_db()
+        self.assertTrue(self.one.is_active)
+
+    def test_remaining_active_admins_is_one_query(self):
+        User.objects.create_user(email="other@example.com", is_staff=True, is_active=False)
+        with self.assertNumQueries(1):
+            self.assertEqual(remaining_active_admins([self.admin.pk]), 0)
+
+    def test_inactive_staff_do_not_count_as_remaining_admins(self):
+        User.objects.create_user(email="other@example.com", is_staff=True, is_active=False)
+        response = self.post("revoke_admin", [self.admin])
+        self.assertRedirects(response, reverse("admin-users"))
+        self.admin.refresh_from_db()
+        self.assertTrue(self.admin.is_staff)
+
+    def test_add_group_inserts_memberships_once(self):
+        group = Group.objects.create(name="Support")
+        self.one.groups.add(group)
+        response = self.post("add_group", [self.one, self.two], group=group.pk)
+        self.assertRedirects(response, reverse("admin-users"))
+        self.assertEqual(
+            set(group.user_set.values_list("email", flat=True)),
+            {"one@example.com", "two@example.com"},
+        )
+        # Lock the group, find who isn't in it yet, insert.
+        with self.assertNumQueries(3), self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(add_to_group([self.admin.pk, self.one.pk], group.pk), 1)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_add_group_rejects_a_deleted_group_still_in_the_choices(self):
+        group = Group.objects.create(name="Support")
+        group_id = group.pk
+        # Another worker's cache still lists the group after it is deleted.
+        with mock.patch("adminpanel.forms.group_choices", return_value=[(group_id, "Support")]):
+            group.delete()
+            response = self.post("add_group", [self.one], group=group_id)
+        self.assertRedirects(response, reverse("admin-users"), fetch_redirect_response=False)
+        response = self.client.get(reverse("admin-users"))
+        self.assertContains(response, "That group no longer exists.")
+        self.assertFalse(self.one.groups.exists())
+
+    def test_add_group_requires_a_group(self):
+        self.post("add_group", [self.one])
+        self.assertFalse(self.one.groups.exists())
+
+    def test_password_resets_are_queued(self):
+        response = self.post("reset_password", [self.one, self.two])
+        self.assertRedirects(response, reverse("admin-users"))
+        self.assertEqual(mail.outbox, [])
+        queued = OutboundEmail.objects.order_by("pk")
+        # two@example.com has no usable password yet but still gets a link.
+        self.assertEqual([item.to for item in queued], [["one@example.com"], ["two@example.com"]])
+        self.assertIn("/reset/", queued[0].body)
@@ -7,6 +7,9 @@ urlpatterns = [
     path("settings/", views.settings_view, name="admin-settings"),
     path("users/", views.user_list, name="admin-users"),
     path("users/new/", views.user_create, name="admin-user-new"),
+    path("users/bulk/", views.user_bulk_action, name="admin-user-bulk"),
+    path("users/export/", views.user_export, name="admin-user-export"),
+    path("users/import/", views.user_import, name="admin-user-import"),
     path("users/<int:user_id>/", views.user_edit, name="admin-user-edit"),
     path("users/<int:user_id>/reset-password/", views.user_reset_password, name="admin-user-reset"),
     path("groups/", views.group_list, name="admin-groups"),
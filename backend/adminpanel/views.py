@@ -1,20 +1,151 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.defaultfilters import pluralize
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
 
+from accounts.bulk_actions import (
+    add_to_group,
+    queue_password_resets,
+    remaining_active_admins,
+    set_flag,
+)
+from accounts.exporting import EXPORT_FORMATS, aiter_sync, iter_export_chunks, iter_export_rows
 from accounts.forms import AdminUserCreateForm, AdminUserForm, SitePasswordResetForm
+from accounts.importing import (
+    READ_ERRORS,
+    UserImporter,
+    describe_read_error,
+    detect_format,
+    iter_rows,
+    open_text,
+)
 from accounts.permissions import admin_required
+from accounts.search import get_user_search_backend
+from core.cache_utils import atable_version, normalize_query, query_digest, table_version
+from core.context_processors import aprime_context
 from core.email_utils import send_test_email
+from core.instrumentation import record_cache
 from core.models import SiteSettings
+from core.pagination import KeysetPaginator, alist_count, list_count
 
-from .forms import GroupForm, SiteSettingsForm
+from .forms import GroupForm, SiteSettingsForm, UserBulkActionForm, UserImportForm
 
 User = get_user_model()
 
 
+def _list_count(queryset, query):
+    if not django_settings.ADMIN_LIST_SHOW_COUNTS:
+        return None
+    return list_count(queryset, query)
+
+
+async def _alist_count(queryset, query):
+    if not django_settings.ADMIN_LIST_SHOW_COUNTS:
+        return None
+    return await alist_count(queryset, query)
+
+
+def _list_digest(request, version, query, sort, cursor):
+    parts = [request.resolver_match.view_name, version, normalize_query(query), sort, cursor]
+    if not django_settings.DEFAULT_CACHE_IS_SHARED:
+        # Writes in other workers never bump this process's version, so let ETags expire.
+        parts.append(int(time.time() // max(1, django_settings.ADMIN_LIST_RESULT_CACHE_TTL)))
+    return query_digest(*parts)
+
+
+def _list_response(request, context, etag, template_name, partial_template_name):
+    if not request.headers.get("HX-Request"):
+        response = render(request, template_name, context)
+    else:
+        response = render(request, partial_template_name, context)
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["HX-Request"])
+    return response
+
+
+def _render_list(
+    request,
+    model,
+    query,
+    load_page,
+    template_name,
+    partial_template_name,
+    extra_context=None,
+    sort="",
+):
+    """Render an admin list, reusing recent result pages across requests.
+
+    Results are cached per (view, normalized query, sort, cursor) and the table's
+    version counter, which also serves as the ETag for HTMX partials.
+    """
+    cursor = request.GET.get("cursor", "")
+    digest = _list_digest(request, table_version(model), query, sort, cursor)
+    is_htmx = bool(request.headers.get("HX-Request"))
+    etag = f'"{digest}"'
+    if is_htmx:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+    cache_key = f"adminpanel:list:{digest}"
+    page_obj, count = cache.get(cache_key) or (None, None)
+    record_cache(hit=page_obj is not None)
+    if page_obj is None:
+        page_obj, count = load_page(cursor)
+        cache.set(cache_key, (page_obj, count), django_settings.ADMIN_LIST_RESULT_CACHE_TTL)
+    context = {"page_obj": page_obj, "query": query, "sort": sort, "count": count}
+    if not is_htmx and extra_context:
+        context.update(extra_context())
+    return _list_response(request, context, etag, template_name, partial_template_name)
+
+
+async def _arender_list(
+    request,
+    model,
+    query,
+    load_page,
+    template_name,
+    partial_template_name,
+    extra_context=None,
+    sort="",
+):
+    """``_render_list`` with the async cache and ORM APIs, for ASGI."""
+    cursor = request.GET.get("cursor", "")
+    digest = _list_digest(request, await atable_version(model), query, sort, cursor)
+    is_htmx = bool(request.headers.get("HX-Request"))
+    etag = f'"{digest}"'
+    if is_htmx:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+    cache_key = f"adminpanel:list:{digest}"
+    page_obj, count = await cache.aget(cache_key) or (None, None)
+    record_cache(hit=page_obj is not None)
+    if page_obj is None:
+        page_obj, count = await load_page(cursor)
+        await cache.aset(cache_key, (page_obj, count), django_settings.ADMIN_LIST_RESULT_CACHE_TTL)
+    await aprime_context(request)
+    context = {"page_obj": page_obj, "query": query, "sort": sort, "count": count}
+    if not is_htmx and extra_context:
+        context.update(await extra_context())
+    return _list_response(request, context, etag, template_name, partial_template_name)
+
+
 @admin_required
 def settings_view(request):
     site_settings = SiteSettings.get_solo()
@@ -46,21 +177,90 @@ def settings_view(request):
     return render(request, "admin/settings.html", {"form": form})
 
 
+def _user_list_ordering(sort):
+    # Served by the unique email index or accounts_user_name_idx.
+    return ("name", "id") if sort else ("email", "id")
+
+
 @admin_required
 def user_list(request):
     query = request.GET.get("q", "").strip()
-    users = User.objects.all().order_by("email")
-    if query:
-        users = users.filter(Q(email__icontains=query) | Q(name__icontains=query))
+    sort = "name" if request.GET.get("sort") == "name" else ""
+
+    def load_page(cursor):
+        users = User.objects.all()
+        ordering = _user_list_ordering(sort)
+        if query:
+            users, ordering = get_user_search_backend().search(users, query)
+        page_obj = KeysetPaginator(users, ordering, 25).get_page(cursor)
+        return page_obj, _list_count(users, query)
+
+    return _render_list(
+        request,
+        User,
+        query,
+        load_page,
+        "admin/users_list.html",
+        "admin/partials/user_table.html",
+        extra_context=lambda: {"bulk_form": UserBulkActionForm()},
+        sort=sort,
+    )
 
-    paginator = Paginator(users, 25)
-    page_obj = paginator.get_page(request.GET.get("page"))
-    context = {"page_obj": page_obj, "query": query}
 
-    if request.headers.get("HX-Request"):
-        return render(request, "admin/partials/user_table.html", context)
+@admin_required
+async def auser_list(request):
+    query = request.GET.get("q", "").strip()
+    sort = "name" if request.GET.get("sort") == "name" else ""
+
+    async def load_page(cursor):
+        users = User.objects.all()
+        ordering = _user_list_ordering(sort)
+        if query:
+            # The first call probes the database for the search table.
+            backend = await sync_to_async(get_user_search_backend)()
+            users, ordering = backend.search(users, query)
+        page_obj = await KeysetPaginator(users, ordering, 25).aget_page(cursor)
+        return page_obj, await _alist_count(users, query)
+
+    async def bulk_form():
+        # Builds the group choices, which come from the cache on most requests.
+        return {"bulk_form": await sync_to_async(UserBulkActionForm)()}
 
-    return render(request, "admin/users_list.html", context)
+    return await _arender_list(
+        request,
+        User,
+        query,
+        load_page,
+        "admin/users_list.html",
+        "admin/partials/user_table.html",
+        extra_context=bulk_form,
+        sort=sort,
+    )
+
+
+EXPORT_CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+@admin_required
+def user_export(request):
+    query = request.GET.get("q", "").strip()
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        export_format = "csv"
+
+    users = User.objects.all()
+    ordering = ("email", "id")
+    if query:
+        users, ordering = get_user_search_backend().search(users, query)
+    chunks = iter_export_chunks(iter_export_rows(users, ordering), export_format)
+    if isinstance(request, ASGIRequest):
+        # Django would otherwise read a sync iterator into a list before sending it.
+        chunks = aiter_sync(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="users.{export_format}"'
+    patch_cache_control(response, private=True, no_store=True)
+    return response
 
 
 @admin_required
@@ -77,6 +277,84 @@ def user_create(request):
     return render(request, "admin/user_create.html", {"form": form})
 
 
+IMPORT_ERRORS_SHOWN = 200
+
+
+@admin_required
+def user_import(request):
+    result = None
+    if request.method == "POST":
+        form = UserImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            import_format = form.cleaned_data["format"] or detect_format(upload.name)
+            importer = UserImporter()
+            try:
+                # Large uploads are already spooled to a temporary file; read it row by row.
+                with open_text(upload.file) as stream:
+                    importer.run(iter_rows(stream, import_format))
+            except READ_ERRORS as exc:
+                form.add_error(
+                    "file",
+                    f"{describe_read_error(exc)} Stopped after {importer.result.processed} rows.",
+                )
+            result = importer.result
+            if result.created:
+                messages.success(request, f"Imported {result.created} users.")
+    else:
+        form = UserImportForm()
+
+    context = {"form": form, "result": result}
+    if result is not None:
+        context["errors"] = result.errors[:IMPORT_ERRORS_SHOWN]
+        context["hidden_errors"] = max(0, len(result.errors) - IMPORT_ERRORS_SHOWN)
+    return render(request, "admin/user_import.html", context)
+
+
+LAST_ADMIN_MESSAGE = "You are the last admin. Assign another admin first."
+BULK_FLAG_ACTIONS = {
+    "activate": ("is_active", True, "activated"),
+    "deactivate": ("is_active", False, "deactivated"),
+    "grant_admin": ("is_staff", True, "made admin"),
+    "revoke_admin": ("is_staff", False, "removed as admin"),
+}
+
+
+@admin_required
+@require_POST
+def user_bulk_action(request):
+    query = request.POST.get("q", "").strip()
+    users_url = reverse("admin-users") + (f"?{urlencode({'q': query})}" if query else "")
+    form = UserBulkActionForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, " ".join(errors))
+        return redirect(users_url)
+
+    action = form.cleaned_data["action"]
+    user_ids = form.cleaned_data["user_ids"]
+    if action in BULK_FLAG_ACTIONS:
+        field, value, verb = BULK_FLAG_ACTIONS[action]
+        with transaction.atomic():
+            if value is False and remaining_active_admins(user_ids) == 0:
+                messages.error(request, LAST_ADMIN_MESSAGE)
+                return redirect(users_url)
+            changed = set_flag(user_ids, field, value)
+        messages.success(request, f"{changed} user{pluralize(changed)} {verb}.")
+    elif action == "add_group":
+        try:
+            with transaction.atomic():
+                added = add_to_group(user_ids, form.cleaned_data["group"])
+        except Group.DoesNotExist:
+            messages.error(request, "That group no longer exists.")
+            return redirect(users_url)
+        messages.success(request, f"{added} user{pluralize(added)} added to the group.")
+    else:
+        queued = queue_password_resets(user_ids, request)
+        messages.success(request, f"{queued} password reset email{pluralize(queued)} queued.")
+    return redirect(users_url)
+
+
 @admin_required
 def user_edit(request, user_id):
     user = get_object_or_404(User, pk=user_id)
@@ -84,14 +362,13 @@ def user_edit(request, user_id):
     if request.method == "POST":
         form = AdminUserForm(request.POST, instance=user)
         if form.is_valid():
-            if not form.cleaned_data.get("is_staff"):
-                other_admins = User.objects.filter(is_staff=True).exclude(pk=user.pk).count()
-                if other_admins == 0:
-                    form.add_error(
-                        "is_staff", "You are the last admin. Assign another admin first."
-                    )
+            with transaction.atomic():
+                if not form.cleaned_data.get("is_staff"):
+                    if remaining_active_admins([user.pk]) == 0:
+                        form.add_error("is_staff", LAST_ADMIN_MESSAGE)
+                if not form.errors:
+                    form.save()
             if not form.errors:
-                form.save()
                 messages.success(request, "User updated.")
                 return redirect("admin-users")
     else:
@@ -125,18 +402,43 @@ def user_reset_password(request, user_id):
 @admin_required
 def group_list(request):
     query = request.GET.get("q", "").strip()
-    groups = Group.objects.all().order_by("name")
-    if query:
-        groups = groups.filter(name__icontains=query)
 
-    paginator = Paginator(groups, 25)
-    page_obj = paginator.get_page(request.GET.get("page"))
-    context = {"page_obj": page_obj, "query": query}
+    def load_page(cursor):
+        groups = Group.objects.all()
+        if query:
+            groups = groups.filter(name__icontains=query)
+        page_obj = KeysetPaginator(groups, ("name", "id"), 25).get_page(cursor)
+        return page_obj, _list_count(groups, query)
+
+    return _render_list(
+        request,
+        Group,
+        query,
+        load_page,
+        "admin/groups_list.html",
+        "admin/partials/group_table.html",
+    )
+
+
+@admin_required
+async def agroup_list(request):
+    query = request.GET.get("q", "").strip()
 
-    if request.headers.get("HX-Request"):
-        return render(request, "admin/partials/group_table.html", context)
+    async def load_page(cursor):
+        groups = Group.objects.all()
+        if query:
+            groups = groups.filter(name__icontains=query)
+        page_obj = await KeysetPaginator(groups, ("name", "id"), 25).aget_page(cursor)
+        return page_obj, await _alist_count(groups, query)
 
-    return render(request, "admin/groups_list.html", context)
+    return await _arender_list(
+        request,
+        Group,
+        query,
+        load_page,
+        "admin/groups_list.html",
+        "admin/partials/group_table.html",
+    )
 
 
 @admin_required
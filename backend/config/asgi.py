@@ -10,5 +10,6 @@ if env_path.exists():
     dotenv.load_dotenv(env_path)
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("ASYNC_VIEWS", "true")
 
 application = get_asgi_application()
@@ -1,7 +1,9 @@
 import os
+import tempfile
 from pathlib import Path
 
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 PROJECT_ROOT = BASE_DIR.parent
@@ -24,9 +26,17 @@ INSTALLED_APPS = [
     "adminpanel.apps.AdminPanelConfig",
 ]
 
+PERFORMANCE_INSTRUMENTATION = os.getenv("PERFORMANCE_INSTRUMENTATION", "false").lower() == "true"
+PERFORMANCE_WINDOW_SIZE = int(os.getenv("PERFORMANCE_WINDOW_SIZE", "1000"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+
 MIDDLEWARE = [
+    "core.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -34,13 +44,21 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "accounts.middleware.MustChangePasswordMiddleware",
+    "accounts.middleware.HashingBusyMiddleware",
 ]
 
-ROOT_URLCONF = "config.urls"
+# config.asgi turns this on, so ASGI servers route the hot pages to async views while
+# WSGI workers keep the sync ones instead of running an event loop per request.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "false").lower() == "true"
+ROOT_URLCONF = "config.urls_async" if ASYNC_VIEWS else "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": (
+            "core.instrumentation.InstrumentedDjangoTemplates"
+            if PERFORMANCE_INSTRUMENTATION
+            else "django.template.backends.django.DjangoTemplates"
+        ),
         "DIRS": [PROJECT_ROOT / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -58,12 +76,116 @@ TEMPLATES = [
 WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
 
+DATABASE_POOL_ENABLED = os.getenv("DATABASE_POOL_ENABLED", "false").lower() == "true"
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{PROJECT_ROOT / 'db.sqlite3'}",
-        conn_max_age=600,
+        # Pooled connections go back to the pool at the end of each request instead.
+        conn_max_age=0 if DATABASE_POOL_ENABLED else int(os.getenv("CONN_MAX_AGE", "600")),
+        conn_health_checks=os.getenv("CONN_HEALTH_CHECKS", "true").lower() == "true",
     )
 }
+if DATABASE_POOL_ENABLED:
+    if DATABASES["default"]["ENGINE"] != "django.db.backends.postgresql":
+        raise ImproperlyConfigured("DATABASE_POOL_ENABLED requires a PostgreSQL DATABASE_URL.")
+    # With CONN_HEALTH_CHECKS Django has the pool ping each connection on checkout, so a
+    # failover never hands out a dead one.
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+        "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", "600")),
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    "sessions": {
+        "BACKEND": os.getenv(
+            "SESSION_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("SESSION_CACHE_LOCATION", "sessions"),
+    },
+}
+
+# These keep a separate copy per process, so invalidations in one worker aren't seen by others.
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+DEFAULT_CACHE_IS_SHARED = CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "coalescing": "core.sessions",
+}
+SESSION_STRATEGY = os.getenv("SESSION_STRATEGY", "db")
+if SESSION_STRATEGY not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f"SESSION_STRATEGY must be one of {', '.join(SESSION_ENGINES)}, not {SESSION_STRATEGY!r}."
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STRATEGY]
+SESSION_CACHE_ALIAS = "sessions"
+SESSION_COOKIE_MAX_BYTES = int(os.getenv("SESSION_COOKIE_MAX_BYTES", "2048"))
+
+USER_SEARCH_BACKEND = os.getenv("USER_SEARCH_BACKEND", "auto")
+ADMIN_LIST_SHOW_COUNTS = os.getenv("ADMIN_LIST_SHOW_COUNTS", "true").lower() == "true"
+ADMIN_LIST_ESTIMATE_THRESHOLD = int(os.getenv("ADMIN_LIST_ESTIMATE_THRESHOLD", "10000"))
+ADMIN_LIST_COUNT_CACHE_TTL = int(os.getenv("ADMIN_LIST_COUNT_CACHE_TTL", "30"))
+ADMIN_LIST_RESULT_CACHE_TTL = int(os.getenv("ADMIN_LIST_RESULT_CACHE_TTL", "10"))
+
+SITE_SETTINGS_LOCAL_TTL = float(os.getenv("SITE_SETTINGS_LOCAL_TTL", "5"))
+SITE_SETTINGS_CACHE_TIMEOUT = int(os.getenv("SITE_SETTINGS_CACHE_TIMEOUT", "300"))
+
+AUTHENTICATION_BACKENDS = ["accounts.backends.CachedModelBackend"]
+# Off by default with a per-process cache; set true only when a single process serves requests.
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", str(DEFAULT_CACHE_IS_SHARED)).lower() == "true"
+USER_SNAPSHOT_CACHE_TIMEOUT = int(os.getenv("USER_SNAPSHOT_CACHE_TIMEOUT", "300"))
+PERMISSION_CACHE_TIMEOUT = int(os.getenv("PERMISSION_CACHE_TIMEOUT", "300"))
+
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "accounts.hashers.PBKDF2PasswordHasher",
+    "scrypt": "accounts.hashers.ScryptPasswordHasher",
+    "argon2": "accounts.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "pbkdf2")
+if PASSWORD_HASHER_PROFILE not in PASSWORD_HASHER_PROFILES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER_PROFILE must be one of {', '.join(PASSWORD_HASHER_PROFILES)}, "
+        f"not {PASSWORD_HASHER_PROFILE!r}."
+    )
+# The preferred hasher comes first; the rest still verify existing hashes.
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(path for name, path in PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER_PROFILE),
+    "accounts.hashers.PBKDF2SHA1PasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000"))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", "16384"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_HASHING_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASHING_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", "64"))
+PASSWORD_HASHING_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASHING_QUEUE_TIMEOUT", "5"))
+
+# Survives container restarts but not a redeploy, so the admin bootstrap runs once per deploy.
+STARTUP_STATE_FILE = os.getenv(
+    "STARTUP_STATE_FILE", os.path.join(tempfile.gettempdir(), "saas-base-startup.json")
+)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_CACHE_ALIAS = os.getenv("RATE_LIMIT_CACHE_ALIAS", "default")
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "50"))
+LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "10"))
+LOGIN_RATE_LIMIT_WINDOW = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "300"))
+PASSWORD_RESET_RATE_LIMIT_PER_IP = int(os.getenv("PASSWORD_RESET_RATE_LIMIT_PER_IP", "10"))
+PASSWORD_RESET_RATE_LIMIT_PER_EMAIL = int(os.getenv("PASSWORD_RESET_RATE_LIMIT_PER_EMAIL", "3"))
+PASSWORD_RESET_RATE_LIMIT_WINDOW = int(os.getenv("PASSWORD_RESET_RATE_LIMIT_WINDOW", "3600"))
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -80,7 +202,12 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [PROJECT_ROOT / "static"]
 STATIC_ROOT = PROJECT_ROOT / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "core.storage.StaticFilesStorage"},
+}
+# Only hashed names are ever referenced once the manifest exists, so skip the copies.
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -97,6 +224,15 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@example.com")
+EMAIL_POOL_MAX_CONNECTIONS = int(os.getenv("EMAIL_POOL_MAX_CONNECTIONS", "2"))
+EMAIL_POOL_IDLE_TIMEOUT = float(os.getenv("EMAIL_POOL_IDLE_TIMEOUT", "60"))
+EMAIL_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("EMAIL_POOL_HEALTH_CHECK_INTERVAL", "5"))
+EMAIL_QUEUE_ENABLED = os.getenv("EMAIL_QUEUE_ENABLED", "true").lower() == "true"
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv("EMAIL_QUEUE_BATCH_SIZE", "50"))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("EMAIL_QUEUE_MAX_ATTEMPTS", "6"))
+EMAIL_QUEUE_RETRY_BASE_DELAY = int(os.getenv("EMAIL_QUEUE_RETRY_BASE_DELAY", "30"))
+EMAIL_QUEUE_RETRY_MAX_DELAY = int(os.getenv("EMAIL_QUEUE_RETRY_MAX_DELAY", "3600"))
+EMAIL_QUEUE_LEASE_SECONDS = int(os.getenv("EMAIL_QUEUE_LEASE_SECONDS", "300"))
 
 CSRF_TRUSTED_ORIGINS = [
     origin.strip() for origin in os.getenv("CSRF_TRUSTED_ORIGINS", "").split(",") if origin.strip()
@@ -105,3 +241,16 @@ CSRF_TRUSTED_ORIGINS = [
 SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "false").lower() == "true"
 CSRF_COOKIE_SECURE = os.getenv("CSRF_COOKIE_SECURE", "false").lower() == "true"
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.performance": {
+            "handlers": ["console"],
+            "level": os.getenv("PERFORMANCE_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
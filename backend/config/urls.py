@@ -5,6 +5,7 @@ from core import views as core_views
 urlpatterns = [
     path("", core_views.home, name="home"),
     path("dashboard/", core_views.dashboard, name="dashboard"),
+    path("metrics", core_views.metrics, name="metrics"),
     path("", include("accounts.urls")),
     path("admin/", include("adminpanel.urls")),
 ]
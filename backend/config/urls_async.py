@@ -0,0 +1,17 @@
+from django.urls import path
+
+from accounts import views as account_views
+from adminpanel import views as admin_views
+from core import views as core_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+# Under ASGI the hot pages are served by their async variants; they come first, so they
+# win both resolving and reversing. Everything else is shared with config.urls.
+urlpatterns = [
+    path("", core_views.ahome, name="home"),
+    path("dashboard/", core_views.adashboard, name="dashboard"),
+    path("profile/", account_views.aprofile, name="profile"),
+    path("admin/users/", admin_views.auser_list, name="admin-users"),
+    path("admin/groups/", admin_views.agroup_list, name="admin-groups"),
+] + sync_urlpatterns
@@ -0,0 +1,68 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+
+def measure(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95_index = max(0, int(len(ordered) * 0.95) - 1)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[p95_index] * 1000,
+    }
+
+
+def format_summary(label, samples):
+    summary = summarize(samples)
+    return (
+        f"{label:<24} n={summary['count']:<8} mean={summary['mean_ms']:.3f}ms "
+        f"p50={summary['p50_ms']:.3f}ms p95={summary['p95_ms']:.3f}ms"
+    )
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run a benchmark inside a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def seed_users(count, batch_size=5000, prefix="bench"):
+    User = get_user_model()
+    password = make_password(None)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        User.objects.bulk_create(
+            User(
+                email=f"{prefix}{created + offset:07d}@example.com",
+                name=f"Bench User {created + offset}",
+                password=password,
+            )
+            for offset in range(size)
+        )
+        created += size
+    return created
@@ -0,0 +1,54 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(model):
+    return f"core:table_version:{model._meta.db_table}"
+
+
+def cache_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never repeats an old version.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+        return cache.get(key)
+
+
+async def acache_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time() * 1000), None)
+        version = await cache.aget(key)
+    return version
+
+
+def table_version(model):
+    return cache_version(_version_key(model))
+
+
+async def atable_version(model):
+    return await acache_version(_version_key(model))
+
+
+def bump_table_version(model):
+    return bump_cache_version(_version_key(model))
+
+
+def normalize_query(query):
+    # Not casefold(): "Straße" and "strasse" are different searches.
+    return query.strip().lower()
+
+
+def query_digest(*parts):
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()[:32]
@@ -1,11 +1,34 @@
 from django.db.utils import OperationalError, ProgrammingError
+from django.utils.functional import SimpleLazyObject
 
 from .models import SiteSettings
 
 
-def site_settings(request):
+def _load_site_settings():
+    try:
+        return SiteSettings.get_solo()
+    except (OperationalError, ProgrammingError):
+        return SiteSettings(registration_enabled=False)
+
+
+async def _aload_site_settings():
     try:
-        settings = SiteSettings.get_solo()
+        return await SiteSettings.aget_solo()
     except (OperationalError, ProgrammingError):
-        settings = SiteSettings(registration_enabled=False)
-    return {"site_settings": settings}
+        return SiteSettings(registration_enabled=False)
+
+
+async def aprime_context(request):
+    """Resolve the lazy values base.html reads so an async view can render without
+    touching the database from the event loop. Site settings are only shown to
+    anonymous visitors, so logged-in pages still skip loading them."""
+    request.user = await request.auser()
+    if not request.user.is_authenticated:
+        request.site_settings = await _aload_site_settings()
+
+
+def site_settings(request):
+    preloaded = getattr(request, "site_settings", None)
+    if preloaded is not None:
+        return {"site_settings": preloaded}
+    return {"site_settings": SimpleLazyObject(_load_site_settings)}
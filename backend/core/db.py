@@ -0,0 +1,25 @@
+import hashlib
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def advisory_lock(name, using="default"):
+    """Hold a Postgres session-level advisory lock for the duration of the block.
+
+    Other databases have no equivalent; there the block runs unguarded, which is
+    fine for SQLite since it only serves a single host.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        yield
+        return
+    key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [key])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
@@ -1,6 +1,13 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
 from django.conf import settings
 from django.core.mail import EmailMessage, get_connection
 
+from .metrics import record_email_send
+
 
 def resolve_from_email(site_settings):
     from_email = site_settings.email_from_email or settings.DEFAULT_FROM_EMAIL
@@ -9,7 +16,7 @@ def resolve_from_email(site_settings):
     return from_email
 
 
-def get_email_connection(site_settings, password_override=None):
+def resolve_email_config(site_settings, password_override=None):
     password = password_override or settings.EMAIL_HOST_PASSWORD
     if site_settings.email_host:
         host = site_settings.email_host
@@ -24,23 +31,184 @@ def get_email_connection(site_settings, password_override=None):
         host_user = settings.EMAIL_HOST_USER
         use_tls = settings.EMAIL_USE_TLS
 
-    return get_connection(
-        host=host,
-        port=port,
-        username=host_user,
-        password=password,
-        use_tls=use_tls,
-    )
+    return {
+        "host": host,
+        "port": port,
+        "username": host_user,
+        "password": password,
+        "use_tls": use_tls,
+    }
+
+
+def get_email_connection(site_settings, password_override=None):
+    return get_connection(**resolve_email_config(site_settings, password_override))
+
+
+class EmailConnectionPool:
+    """Per-worker pool of open email backends keyed on the resolved SMTP config."""
+
+    def __init__(self, max_connections=None, idle_timeout=None, health_check_interval=None):
+        self._max_connections = max_connections
+        self._idle_timeout = idle_timeout
+        self._health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._size = 0
+
+    @property
+    def max_connections(self):
+        return self._max_connections or settings.EMAIL_POOL_MAX_CONNECTIONS
+
+    @property
+    def idle_timeout(self):
+        return self._idle_timeout or settings.EMAIL_POOL_IDLE_TIMEOUT
+
+    @property
+    def health_check_interval(self):
+        if self._health_check_interval is not None:
+            return self._health_check_interval
+        return settings.EMAIL_POOL_HEALTH_CHECK_INTERVAL
+
+    @staticmethod
+    def pool_key(config):
+        password_digest = hashlib.sha256((config["password"] or "").encode()).hexdigest()[:16]
+        return (
+            config["host"],
+            config["port"],
+            config["username"],
+            config["use_tls"],
+            password_digest,
+        )
+
+    @contextmanager
+    def connection(self, config):
+        key = self.pool_key(config)
+        connection, pooled = self._acquire(key, config)
+        try:
+            yield connection
+        except Exception:
+            self._discard(connection, pooled)
+            raise
+        if pooled:
+            self._release(key, connection)
+        else:
+            connection.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            self._size -= sum(len(entries) for entries in idle.values())
+        for entries in idle.values():
+            for connection, _ in entries:
+                self._close_quietly(connection)
+
+    def _acquire(self, key, config):
+        while True:
+            evicted = None
+            with self._lock:
+                entries = self._idle.get(key)
+                entry = entries.pop() if entries else None
+                if entry is None:
+                    pooled = True
+                    if self._size < self.max_connections:
+                        self._size += 1
+                    else:
+                        evicted = self._pop_oldest_idle_locked()
+                        pooled = evicted is not None
+            if evicted is not None:
+                self._close_quietly(evicted)
+            if entry is None:
+                break
+            connection, last_used = entry
+            if self._is_usable(connection, time.monotonic() - last_used):
+                return connection, True
+            self._discard(connection, True)
+
+        connection = get_connection(**config)
+        try:
+            connection.open()
+        except Exception:
+            if pooled:
+                with self._lock:
+                    self._size -= 1
+            raise
+        return connection, pooled
+
+    def _release(self, key, connection):
+        with self._lock:
+            self._idle.setdefault(key, []).append((connection, time.monotonic()))
+
+    def _discard(self, connection, pooled):
+        if pooled:
+            with self._lock:
+                self._size -= 1
+        self._close_quietly(connection)
+
+    def _pop_oldest_idle_locked(self):
+        oldest_key, oldest_index, oldest_used = None, None, None
+        for key, entries in self._idle.items():
+            for index, (_, last_used) in enumerate(entries):
+                if oldest_used is None or last_used < oldest_used:
+                    oldest_key, oldest_index, oldest_used = key, index, last_used
+        if oldest_key is None:
+            return None
+        connection, _ = self._idle[oldest_key].pop(oldest_index)
+        return connection
+
+    def _is_usable(self, connection, idle_for):
+        if idle_for > self.idle_timeout:
+            return False
+        if not hasattr(connection, "connection"):
+            return True
+        smtp = connection.connection
+        if smtp is None:
+            return False
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            status, _ = smtp.noop()
+        except Exception:
+            return False
+        return status == 250
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+email_pool = EmailConnectionPool()
+
+
+def send_email_message(message, fail_silently=False):
+    started = time.perf_counter()
+    try:
+        sent = message.send(fail_silently=fail_silently)
+    except Exception:
+        record_email_send(time.perf_counter() - started, "error")
+        raise
+    record_email_send(time.perf_counter() - started, "sent")
+    return sent
+
+
+@contextmanager
+def pooled_email_connection(site_settings, password_override=None):
+    config = resolve_email_config(site_settings, password_override)
+    with email_pool.connection(config) as connection:
+        yield connection
 
 
 def send_test_email(site_settings, to_email, password_override=None):
     subject = "Email configuration test"
     body = "This is a test email sent from your Django starter app."
-    email = EmailMessage(
-        subject=subject,
-        body=body,
-        from_email=resolve_from_email(site_settings),
-        to=[to_email],
-        connection=get_email_connection(site_settings, password_override=password_override),
-    )
-    email.send(fail_silently=False)
+    with pooled_email_connection(site_settings, password_override) as connection:
+        email = EmailMessage(
+            subject=subject,
+            body=body,
+            from_email=resolve_from_email(site_settings),
+            to=[to_email],
+            connection=connection,
+        )
+        send_email_message(email)
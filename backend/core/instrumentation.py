@@ -0,0 +1,151 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_metrics = contextvars.ContextVar("core_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = (
+        "started",
+        "db_queries",
+        "db_seconds",
+        "template_seconds",
+        "cache_hits",
+        "cache_misses",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+def start_request_metrics():
+    metrics = RequestMetrics()
+    return metrics, _current_metrics.set(metrics)
+
+
+def finish_request_metrics(token):
+    _current_metrics.reset(token)
+
+
+def record_cache(hit):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class Histogram:
+    """Cumulative bucket counts plus a bounded window of recent samples."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS, window=None):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window or settings.PERFORMANCE_WINDOW_SIZE)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.total += value
+            self.count += 1
+            self.recent.append(value)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            counts = list(self.counts)
+            total, count = self.total, self.count
+        return {
+            "buckets": dict(zip(self.buckets + (float("inf"),), counts)),
+            "count": count,
+            "sum": total,
+            "p50": _percentile(recent, 0.5),
+            "p95": _percentile(recent, 0.95),
+        }
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+_view_histograms = {}
+_view_histograms_lock = threading.Lock()
+
+
+def observe_view(view_name, duration_ms):
+    histogram = _view_histograms.get(view_name)
+    if histogram is None:
+        with _view_histograms_lock:
+            histogram = _view_histograms.setdefault(view_name, Histogram())
+    histogram.observe(duration_ms)
+
+
+def view_stats():
+    with _view_histograms_lock:
+        items = list(_view_histograms.items())
+    return {view_name: histogram.snapshot() for view_name, histogram in items}
+
+
+def reset_view_stats():
+    with _view_histograms_lock:
+        _view_histograms.clear()
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds top-level render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,120 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .email_utils import pooled_email_connection, send_email_message
+from .models import OutboundEmail, SiteSettings
+
+
+def outbound_email(subject, body, from_email, to, html_body=""):
+    return OutboundEmail(
+        subject=subject,
+        body=body,
+        html_body=html_body or "",
+        from_email=from_email,
+        to=list(to),
+    )
+
+
+def enqueue_email(subject, body, from_email, to, html_body=""):
+    email = outbound_email(subject, body, from_email, to, html_body)
+    email.save()
+    return email
+
+
+def enqueue_emails(emails):
+    """Queue several unsaved ``OutboundEmail`` rows with one insert."""
+    return OutboundEmail.objects.bulk_create(emails)
+
+
+def drain_queue_in_background():
+    """Send everything that is due from a thread, for deployments without a mailer worker."""
+
+    def drain():
+        try:
+            while any(send_queued_mail().values()):
+                pass
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=drain, name="mail-queue-drain", daemon=True).start()
+
+
+def retry_delay(attempts):
+    delay = settings.EMAIL_QUEUE_RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.EMAIL_QUEUE_RETRY_MAX_DELAY))
+
+
+def claim_batch(batch_size, now=None):
+    """Lease due messages by pushing their next attempt past the worker's send window."""
+    now = now or timezone.now()
+    lease_until = now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE_SECONDS)
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "pk")[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[item.pk for item in batch]).update(
+            next_attempt_at=lease_until
+        )
+    return batch
+
+
+def send_queued_mail(batch_size=None, max_attempts=None):
+    batch_size = batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_QUEUE_MAX_ATTEMPTS
+    batch = claim_batch(batch_size)
+    results = {"sent": 0, "retried": 0, "dead": 0}
+    if not batch:
+        return results
+
+    remaining = list(reversed(batch))
+    try:
+        with pooled_email_connection(SiteSettings.get_solo()) as connection:
+            while remaining:
+                item = remaining[-1]
+                try:
+                    send_email_message(_build_message(item, connection))
+                except Exception as exc:
+                    connection.close()
+                    _record_failure(item, exc, max_attempts, results)
+                else:
+                    item.status = OutboundEmail.STATUS_SENT
+                    item.sent_at = timezone.now()
+                    item.attempts += 1
+                    item.save(update_fields=["status", "sent_at", "attempts"])
+                    results["sent"] += 1
+                remaining.pop()
+    except Exception as exc:
+        for item in remaining:
+            _record_failure(item, exc, max_attempts, results)
+    return results
+
+
+def _build_message(item, connection):
+    message = EmailMultiAlternatives(
+        item.subject,
+        item.body,
+        item.from_email,
+        item.to,
+        connection=connection,
+    )
+    if item.html_body:
+        message.attach_alternative(item.html_body, "text/html")
+    return message
+
+
+def _record_failure(item, exc, max_attempts, results):
+    item.attempts += 1
+    item.last_error = f"{type(exc).__name__}: {exc}"
+    if item.attempts >= max_attempts:
+        item.status = OutboundEmail.STATUS_DEAD
+    else:
+        item.next_attempt_at = timezone.now() + retry_delay(item.attempts)
+    item.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+    results["dead" if item.status == OutboundEmail.STATUS_DEAD else "retried"] += 1
@@ -0,0 +1,89 @@
+import copy
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core.benchmarking import format_summary, measure
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent requests against the default database with per-request, "
+        "persistent and pooled connections, and report latency and connections opened."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per thread.")
+        parser.add_argument("--pool-size", type=int, default=4)
+
+    def handle(self, *args, **options):
+        base = copy.deepcopy(connections["default"].settings_dict)
+        base["OPTIONS"].pop("pool", None)
+        modes = {
+            "per-request": dict(base, CONN_MAX_AGE=0),
+            "persistent": dict(base, CONN_MAX_AGE=600),
+        }
+        if base["ENGINE"] == "django.db.backends.postgresql":
+            pool = {"min_size": options["pool_size"], "max_size": options["pool_size"]}
+            modes["pooled"] = dict(base, CONN_MAX_AGE=0, OPTIONS=dict(base["OPTIONS"], pool=pool))
+        else:
+            self.stdout.write("pooled: skipped, connection pooling needs PostgreSQL and psycopg 3.")
+
+        total = options["threads"] * options["requests"]
+        for mode, settings_dict in modes.items():
+            samples, opened, waited_ms = self._run(mode, settings_dict, options)
+            self.stdout.write(
+                f"{format_summary(mode, samples)} connections_opened={opened} "
+                f"reuse={1 - opened / total:.1%}"
+                + (f" pool_wait={waited_ms:.0f}ms" if waited_ms else "")
+            )
+
+    def _run(self, mode, settings_dict, options):
+        alias = f"bench_{mode.replace('-', '_')}"
+        connections.settings[alias] = settings_dict
+        opened = []
+        samples = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    opened.append(1)
+
+        def request():
+            # What Django's request_started/request_finished handlers do around a view.
+            connection = connections[alias]
+            connection.close_if_unusable_or_obsolete()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            connection.close_if_unusable_or_obsolete()
+
+        def worker():
+            thread_samples = measure(request, options["requests"])
+            connections[alias].close()
+            with lock:
+                samples.extend(thread_samples)
+
+        connection_created.connect(count_connection)
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            connection_created.disconnect(count_connection)
+
+        waited_ms = 0
+        if settings_dict["OPTIONS"].get("pool"):
+            # Every checkout fires connection_created; the pool knows what it really opened.
+            stats = connections[alias].pool.get_stats()
+            opened = [1] * stats.get("connections_num", 0)
+            waited_ms = stats.get("requests_wait_ms", 0)
+            connections[alias].close_pool()
+        del connections.settings[alias]
+        return samples, len(opened), waited_ms
@@ -0,0 +1,99 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.benchmarking import format_summary, measure
+from core.email_utils import EmailConnectionPool
+
+
+class _SMTPStandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        delay = self.server.handshake_delay
+        time.sleep(delay)
+        self._reply("220 localhost bench stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                time.sleep(delay)
+                self._reply("250 localhost")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+    def _reply(self, message):
+        self.wfile.write(f"{message}\r\n".encode("ascii"))
+
+
+class _SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Command(BaseCommand):
+    help = "Compare per-message SMTP latency with fresh connections against the pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument(
+            "--handshake-delay-ms",
+            type=float,
+            default=20.0,
+            help="Simulated connect/EHLO latency of the relay.",
+        )
+
+    def handle(self, *args, **options):
+        server = _SMTPStandIn(("127.0.0.1", 0), _SMTPStandInHandler)
+        server.handshake_delay = options["handshake_delay_ms"] / 1000
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        config = {
+            "host": "127.0.0.1",
+            "port": server.server_address[1],
+            "username": "",
+            "password": "",
+            "use_tls": False,
+        }
+        backend = "django.core.mail.backends.smtp.EmailBackend"
+        try:
+            with override_settings(EMAIL_BACKEND=backend):
+                self._run(config, options["messages"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, config, messages):
+        def send(connection):
+            EmailMessage(
+                "Benchmark",
+                "Benchmark body",
+                "bench@example.com",
+                ["to@example.com"],
+                connection=connection,
+            ).send()
+
+        def send_unpooled():
+            send(get_connection(**config))
+
+        pool = EmailConnectionPool(max_connections=1, idle_timeout=60)
+
+        def send_pooled():
+            with pool.connection(config) as connection:
+                send(connection)
+
+        self.stdout.write(format_summary("new connection", measure(send_unpooled, messages)))
+        self.stdout.write(format_summary("pooled connection", measure(send_pooled, messages)))
+        pool.clear()
@@ -0,0 +1,156 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import format_summary
+
+User = get_user_model()
+
+SERVERS = {
+    "gunicorn-sync": [
+        "-m",
+        "gunicorn",
+        "config.wsgi:application",
+        "--workers",
+        "{workers}",
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ],
+    # The async views under WSGI: each request runs its own event loop and hops to a
+    # thread for every ORM and cache call.
+    "gunicorn-async-views": [
+        "-m",
+        "gunicorn",
+        "config.wsgi:application",
+        "--workers",
+        "{workers}",
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ],
+    "uvicorn": [
+        "-m",
+        "uvicorn",
+        "config.asgi:application",
+        "--workers",
+        "{workers}",
+        "--port",
+        "{port}",
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ],
+}
+
+
+SERVER_ENV = {
+    "gunicorn-sync": {"ASYNC_VIEWS": "false"},
+    "gunicorn-async-views": {"ASYNC_VIEWS": "true"},
+    "uvicorn": {"ASYNC_VIEWS": "true"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the same pages under sync gunicorn workers with the sync views, with the "
+        "async views, and under uvicorn (ASGI) workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--paths", nargs="+", default=["/", "/dashboard/", "/profile/", "/admin/users/"]
+        )
+        parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(
+            email="bench-servers@example.com", password=None, is_staff=True
+        )
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+        try:
+            for name in options["servers"]:
+                self._bench_server(name, cookie, options)
+        finally:
+            session.delete()
+            user.delete()
+
+    def _bench_server(self, name, cookie, options):
+        port = _free_port()
+        command = [sys.executable] + [
+            part.format(workers=options["workers"], port=port) for part in SERVERS[name]
+        ]
+        env = dict(os.environ, ALLOWED_HOSTS="127.0.0.1,localhost", **SERVER_ENV[name])
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            _wait_for_port(port)
+            self.stdout.write(f"\n{name} ({options['workers']} workers)")
+            for path in options["paths"]:
+                samples, elapsed = _load(port, path, cookie, options)
+                self.stdout.write(
+                    f"{format_summary(path, samples)} {len(samples) / elapsed:.0f} req/s"
+                )
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server on port {port} did not start.")
+
+
+def _load(port, path, cookie, options):
+    local = threading.local()
+    headers = {"Cookie": cookie}
+
+    def fetch(_):
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection("127.0.0.1", port)
+        started = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise CommandError(f"GET {path} returned {response.status}")
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+        list(executor.map(fetch, range(options["concurrency"])))
+        started = time.perf_counter()
+        samples = list(executor.map(fetch, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
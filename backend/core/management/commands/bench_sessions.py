@@ -0,0 +1,87 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.benchmarking import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare database round-trips per request for each session strategy."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        engines = {
+            "db": "django.contrib.sessions.backends.db",
+            "cached_db": "django.contrib.sessions.backends.cached_db",
+            "coalescing": "core.sessions",
+        }
+        for label, engine in engines.items():
+            with override_settings(SESSION_ENGINE=engine, ALLOWED_HOSTS=["testserver"]):
+                with rolled_back():
+                    authenticated = self._authenticated(options["requests"])
+                    anonymous = self._anonymous(options["requests"])
+            self.stdout.write(f"{label:<12} authenticated {authenticated}")
+            self.stdout.write(f"{'':<12} reset flow    {anonymous}")
+
+    def _authenticated(self, requests):
+        user = User.objects.create_user(email="bench-session@example.com", password=None)
+        client = Client()
+        client.force_login(user)
+        urls = [reverse("dashboard"), reverse("profile")]
+        result = self._run(client, [urls[index % len(urls)] for index in range(requests)])
+        client.logout()
+        return result
+
+    def _anonymous(self, requests):
+        user = User.objects.create_user(email="bench-reset@example.com", password=None)
+        url = reverse(
+            "password_reset_confirm",
+            args=[
+                urlsafe_base64_encode(force_bytes(user.pk)),
+                default_token_generator.make_token(user),
+            ],
+        )
+        results = []
+        for _ in range(requests // 2):
+            client = Client()
+            # The confirm view stores the token in the session and redirects.
+            results.append(self._run(client, [url], follow=True, raw=True))
+        queries = sum(result[0] for result in results)
+        session_queries = sum(result[1] for result in results)
+        elapsed = sum(result[2] for result in results)
+        return self._format(len(results), queries, session_queries, elapsed, unit="flow")
+
+    def _run(self, client, urls, follow=False, raw=False):
+        queries = session_queries = 0
+        elapsed = 0.0
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                client.get(url, follow=follow)
+                elapsed += time.perf_counter() - started
+            queries += len(context.captured_queries)
+            session_queries += sum(
+                "django_session" in query["sql"] for query in context.captured_queries
+            )
+        if raw:
+            return queries, session_queries, elapsed
+        return self._format(len(urls), queries, session_queries, elapsed)
+
+    def _format(self, count, queries, session_queries, elapsed, unit="request"):
+        return (
+            f"n={count:<6} queries/{unit}={queries / count:.2f} "
+            f"session queries/{unit}={session_queries / count:.2f} "
+            f"mean={elapsed / count * 1000:.3f}ms"
+        )
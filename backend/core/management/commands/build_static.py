@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+BUILD_STATE_NAME = "static-build.json"
+IGNORE_PATTERNS = ["CVS", ".*", "*~"]
+
+
+def static_source_hash():
+    """Fingerprint the files collectstatic would pick up and the settings that shape its output."""
+    digest = hashlib.sha256()
+    digest.update(f"{settings.STATIC_URL}\0{settings.STORAGES['staticfiles']}\0".encode())
+    entries = {}
+    for finder in finders.get_finders():
+        for path, storage in finder.list(IGNORE_PATTERNS):
+            prefix = getattr(storage, "prefix", None)
+            name = os.path.join(prefix, path) if prefix else path
+            # The first finder to list a path wins, as in collectstatic.
+            entries.setdefault(name, storage.path(path))
+    for name in sorted(entries):
+        digest.update(name.encode() + b"\0")
+        with open(entries[name], "rb") as handle:
+            for chunk in iter(lambda: handle.read(65536), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_build_state():
+    try:
+        return json.loads((Path(settings.STATIC_ROOT) / BUILD_STATE_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_is_current(source_hash):
+    return (
+        staticfiles_storage.read_manifest() is not None
+        and load_build_state().get("source_hash") == source_hash
+    )
+
+
+def _size(path):
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+def build_report(storage=staticfiles_storage):
+    root = Path(settings.STATIC_ROOT)
+    hashed_files, _manifest_hash = storage.load_manifest()
+    files = []
+    for name in sorted(set(hashed_files.values())):
+        path = root / name
+        size = _size(path)
+        if size is None:
+            continue
+        files.append(
+            {
+                "name": name,
+                "size": size,
+                "gzip": _size(path.with_name(path.name + ".gz")),
+                "brotli": _size(path.with_name(path.name + ".br")),
+            }
+        )
+    return files
+
+
+class Command(BaseCommand):
+    help = (
+        "Collect, hash and precompress static files when their sources changed, "
+        "and report sizes and compression ratios."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Run collectstatic even if nothing changed."
+        )
+
+    def handle(self, *args, **options):
+        source_hash = static_source_hash()
+        if not options["force"] and build_is_current(source_hash):
+            self.stdout.write(
+                f"Static files unchanged ({source_hash[:12]}); skipping collectstatic."
+            )
+            return
+
+        call_command("collectstatic", interactive=False, verbosity=0)
+        files = build_report()
+        state = {
+            "source_hash": source_hash,
+            "manifest_hash": staticfiles_storage.manifest_hash,
+            "files": files,
+        }
+        (Path(settings.STATIC_ROOT) / BUILD_STATE_NAME).write_text(json.dumps(state, indent=2))
+        self._write_report(files)
+
+    def _write_report(self, files):
+        self.stdout.write(f"{'file':<48} {'bytes':>10} {'gzip':>16} {'brotli':>16}")
+        totals = {"size": 0, "gzip": 0, "brotli": 0}
+        for entry in files:
+            totals["size"] += entry["size"]
+            for key in ("gzip", "brotli"):
+                totals[key] += entry[key] or entry["size"]
+            self.stdout.write(
+                f"{entry['name']:<48} {entry['size']:>10} "
+                f"{_compressed(entry['gzip'], entry['size']):>16} "
+                f"{_compressed(entry['brotli'], entry['size']):>16}"
+            )
+        self.stdout.write(
+            f"{f'total ({len(files)} files)':<48} {totals['size']:>10} "
+            f"{_compressed(totals['gzip'], totals['size']):>16} "
+            f"{_compressed(totals['brotli'], totals['size']):>16}"
+        )
+
+
+def _compressed(size, original):
+    if size is None:
+        return "-"
+    return f"{size} ({size / original:.1%})" if original else str(size)
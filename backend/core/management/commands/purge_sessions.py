@@ -0,0 +1,28 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Delete expired database sessions in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sleep", type=float, default=0.0, help="Seconds to pause between batches."
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        purged = 0
+        while True:
+            keys = list(expired.values_list("session_key", flat=True)[: options["batch_size"]])
+            if not keys:
+                break
+            purged += expired.filter(session_key__in=keys).delete()[0]
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        self.stdout.write(f"Purged {purged} expired sessions.")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail_queue import send_queued_mail
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound email in batches, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--max-attempts", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new mail.")
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            totals = {"sent": 0, "retried": 0, "dead": 0}
+            while True:
+                results = send_queued_mail(
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                )
+                for key, value in results.items():
+                    totals[key] += value
+                if not any(results.values()):
+                    break
+            if any(totals.values()) or not options["loop"]:
+                self.stdout.write(
+                    f"Sent {totals['sent']}, retrying {totals['retried']}, dead {totals['dead']}."
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
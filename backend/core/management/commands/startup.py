@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.utils.crypto import salted_hmac
+
+from accounts.bootstrap import ensure_initial_admin
+from core.db import advisory_lock
+from core.management.commands.build_static import build_is_current, static_source_hash
+from core.metrics import clear_snapshots
+
+STARTUP_LOCK = "core.startup"
+ADMIN_ENV = (
+    "INITIAL_ADMIN_EMAIL",
+    "INITIAL_ADMIN_PASSWORD",
+    "INITIAL_ADMIN_NAME",
+    "INITIAL_ADMIN_FORCE_PASSWORD_RESET",
+    "INITIAL_ADMIN_RESET_PASSWORD",
+)
+
+
+def migration_graph_hash(graph):
+    digest = hashlib.sha256()
+    for app_label, name in sorted(graph.nodes):
+        digest.update(f"{app_label}.{name}\0".encode())
+    return digest.hexdigest()
+
+
+def deploy_fingerprint(graph_hash):
+    """Identify a deploy by its migrations and admin bootstrap settings.
+
+    Keyed with SECRET_KEY, so the stored value can't be used to guess
+    INITIAL_ADMIN_PASSWORD offline.
+    """
+    value = graph_hash + "".join(f"\0{name}={os.getenv(name, '')}" for name in ADMIN_ENV)
+    return salted_hmac("core.startup.deploy", value, algorithm="sha256").hexdigest()
+
+
+def read_startup_state():
+    try:
+        return json.loads(Path(settings.STARTUP_STATE_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare the container before the server starts: apply pending migrations, rebuild "
+        "static files if their sources changed, bootstrap the initial admin and clear old "
+        "metrics snapshots."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-static", action="store_true", help="Do not check or build static files."
+        )
+        parser.add_argument(
+            "--force-bootstrap",
+            action="store_true",
+            help="Run the admin bootstrap even if it already ran for this deploy.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        timings = []
+
+        # Containers of one deploy start together; only one migrates or bootstraps at a time.
+        with advisory_lock(STARTUP_LOCK):
+            timings.append(self._step("migrate", self._migrate))
+            if not options["skip_static"]:
+                timings.append(self._step("static", self._build_static))
+            timings.append(self._step("admin", self._bootstrap_admin, options["force_bootstrap"]))
+            timings.append(self._step("metrics", self._clear_metrics))
+
+        total_ms = (time.perf_counter() - started) * 1000
+        steps = ", ".join(f"{name} {outcome} {ms:.0f}ms" for name, outcome, ms in timings)
+        self.stdout.write(self.style.SUCCESS(f"Startup ready in {total_ms:.0f}ms ({steps})."))
+
+    def _step(self, name, func, *args):
+        started = time.perf_counter()
+        outcome = func(*args)
+        return name, outcome, (time.perf_counter() - started) * 1000
+
+    def _migrate(self):
+        executor = MigrationExecutor(connection)
+        graph = executor.loader.graph
+        self.graph_hash = migration_graph_hash(graph)
+        self.migrated = False
+        plan = executor.migration_plan(graph.leaf_nodes())
+        if not plan:
+            self.stdout.write(f"Migrations up to date ({self.graph_hash[:12]}).")
+            return "skipped"
+        self.stdout.write(f"Applying {len(plan)} migration(s) ({self.graph_hash[:12]}).")
+        call_command("migrate", interactive=False, verbosity=0)
+        self.migrated = True
+        return "ran"
+
+    def _build_static(self):
+        source_hash = static_source_hash()
+        if build_is_current(source_hash):
+            self.stdout.write(f"Static files up to date ({source_hash[:12]}).")
+            return "skipped"
+        call_command("build_static", force=True, stdout=self.stdout)
+        return "ran"
+
+    def _clear_metrics(self):
+        # Snapshots of the previous deploy's workers would otherwise be summed forever.
+        removed = clear_snapshots()
+        if not removed:
+            return "skipped"
+        self.stdout.write(f"Removed {removed} metrics snapshot(s).")
+        return "ran"
+
+    def _bootstrap_admin(self, force):
+        fingerprint = deploy_fingerprint(self.graph_hash)
+        state = read_startup_state()
+        if not force and not self.migrated and state.get("deploy") == fingerprint:
+            self.stdout.write("Initial admin already checked for this deploy.")
+            return "skipped"
+        ensure_initial_admin()
+        state_file = Path(settings.STARTUP_STATE_FILE)
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        state_file.write_text(json.dumps({"deploy": fingerprint}))
+        return "ran"
@@ -0,0 +1,344 @@
+import atexit
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+# A snapshot not rewritten for this many flush intervals is from a process that exited or
+# went idle; its counters still count, but its gauges no longer describe anything live.
+STALE_SNAPSHOT_INTERVALS = 5
+
+HTTP_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EMAIL_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    "app_http_requests_total": ("counter", "HTTP responses by view, method and status."),
+    "app_http_request_duration_seconds": ("histogram", "Request latency by view."),
+    "app_db_queries_total": ("counter", "Database queries executed by view."),
+    "app_db_connections_opened_total": ("counter", "New database connections opened."),
+    "app_email_send_duration_seconds": ("histogram", "Outbound email send latency."),
+    "app_cache_requests_total": ("counter", "Application cache lookups by result."),
+    "app_throttled_requests_total": ("counter", "Requests rejected by rate limits."),
+    "app_db_pool_checkouts_total": ("counter", "Connections handed out by the database pool."),
+    "app_db_pool_wait_seconds_total": ("counter", "Time spent waiting for a pooled connection."),
+    "app_db_pool_timeouts_total": ("counter", "Pool checkouts that timed out or failed."),
+    "app_db_pool_connections_opened_total": ("counter", "Connections opened by the pool."),
+    "app_db_pool_connections_lost_total": ("counter", "Pooled connections that failed a check."),
+    "app_db_pool_size": ("gauge", "Connections currently held by the pool, per process."),
+    "app_db_pool_available": ("gauge", "Idle connections in the pool, per process."),
+    "app_db_pool_waiting": ("gauge", "Requests waiting for a pooled connection, per process."),
+}
+
+
+class MetricsRegistry:
+    """Per-process counters and histograms, shared across workers through files.
+
+    Each process periodically writes its own snapshot to ``METRICS_DIR/<host>-<pid>.json``
+    with an atomic rename; the exposition endpoint sums every snapshot it finds,
+    so any worker can answer a scrape for the whole server.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._last_flush = 0.0
+        self._dirty = False
+        self._collectors = []
+        self._collecting = False
+
+    def add_collector(self, func):
+        """Run ``func`` before every flush and scrape to pull in state kept elsewhere."""
+        self._collectors.append(func)
+
+    def run_collectors(self):
+        self._collecting = True
+        try:
+            for func in self._collectors:
+                func(self)
+        finally:
+            self._collecting = False
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._dirty = True
+        self._maybe_flush()
+
+    def observe(self, name, value, buckets, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    "buckets": list(buckets),
+                    "counts": [0] * (len(buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            histogram["counts"][bisect_left(histogram["buckets"], value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+            self._dirty = True
+        self._maybe_flush()
+
+    def set_gauge(self, name, value, labels=None):
+        labels = dict(labels or {}, pid=str(os.getpid()))
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value] for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), dict(histogram, counts=list(histogram["counts"]))]
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+                "gauges": [
+                    [name, list(labels), value] for (name, labels), value in self._gauges.items()
+                ],
+            }
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.run_collectors()
+        payload = json.dumps(self.snapshot())
+        with tempfile.NamedTemporaryFile("w", dir=path, suffix=".tmp", delete=False) as handle:
+            handle.write(payload)
+        os.replace(handle.name, path / _snapshot_name())
+        self._last_flush = time.monotonic()
+        self._dirty = False
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+            self._dirty = False
+
+    def _maybe_flush(self):
+        if not settings.METRICS_DIR or self._collecting:
+            return
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self):
+        """Merge this process's live state with every other worker's snapshot."""
+        self.run_collectors()
+        snapshots = [self.snapshot()]
+        stale = set()
+        directory = settings.METRICS_DIR
+        if directory and os.path.isdir(directory):
+            own = _snapshot_name()
+            for entry in os.scandir(directory):
+                if not entry.name.endswith(".json") or entry.name == own:
+                    continue
+                try:
+                    with open(entry.path) as handle:
+                        snapshots.append(json.load(handle))
+                    if _is_stale(entry):
+                        stale.add(len(snapshots) - 1)
+                except (OSError, ValueError):
+                    continue
+
+        counters, histograms, gauges = {}, {}, {}
+        for index, snapshot in enumerate(snapshots):
+            for name, labels, value in snapshot["counters"]:
+                key = (name, _label_key(dict(labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, data in snapshot["histograms"]:
+                key = (name, _label_key(dict(labels)))
+                merged = histograms.setdefault(
+                    key,
+                    {
+                        "buckets": data["buckets"],
+                        "counts": [0] * len(data["counts"]),
+                        "sum": 0.0,
+                        "count": 0,
+                    },
+                )
+                merged["counts"] = [a + b for a, b in zip(merged["counts"], data["counts"])]
+                merged["sum"] += data["sum"]
+                merged["count"] += data["count"]
+            if index in stale:
+                continue
+            for name, labels, value in snapshot.get("gauges", []):
+                gauges[(name, _label_key(dict(labels)))] = value
+        return counters, histograms, gauges
+
+
+def _snapshot_name():
+    return f"{socket.gethostname()}-{os.getpid()}.json"
+
+
+def _is_stale(entry):
+    host, _, pid = entry.name.removesuffix(".json").rpartition("-")
+    if host == socket.gethostname() and pid.isdigit():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+    age = time.time() - entry.stat().st_mtime
+    return age > STALE_SNAPSHOT_INTERVALS * settings.METRICS_FLUSH_INTERVAL
+
+
+def clear_snapshots():
+    """Remove every snapshot in ``METRICS_DIR``; live processes write theirs again on flush."""
+    directory = settings.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith((".json", ".tmp")):
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+    return removed
+
+
+def _label_key(labels):
+    if not labels:
+        return ()
+    return tuple(sorted((str(key), str(value)) for key, value in dict(labels).items()))
+
+
+def _escape_label_value(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in pairs) + "}"
+
+
+def render_exposition(registry=None):
+    counters, histograms, gauges = (registry or metrics).collect()
+    lines = []
+    described = set()
+
+    def describe(name, default_type):
+        if name in described:
+            return
+        described.add(name)
+        metric_type, help_text = METRIC_HELP.get(name, (default_type, name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), data in sorted(histograms.items()):
+        describe(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(data["buckets"] + ["+Inf"], data["counts"]):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}"
+            )
+        lines.append(f"{name}_sum{_format_labels(labels)} {data['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {data['count']}")
+    for (name, labels), value in sorted(gauges.items()):
+        describe(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def record_pool_stats(registry):
+    """Move the psycopg pool counters accumulated since the last call into ``registry``."""
+    if not settings.METRICS_ENABLED:
+        return
+    for alias, settings_dict in settings.DATABASES.items():
+        if not settings_dict.get("OPTIONS", {}).get("pool"):
+            continue
+        pool = connections[alias].pool
+        stats = pool.pop_stats()
+        labels = {"alias": alias}
+        for name, key in (
+            ("app_db_pool_checkouts_total", "requests_num"),
+            ("app_db_pool_timeouts_total", "requests_errors"),
+            ("app_db_pool_connections_opened_total", "connections_num"),
+            ("app_db_pool_connections_lost_total", "connections_lost"),
+        ):
+            if stats.get(key):
+                registry.inc(name, labels, stats[key])
+        if stats.get("requests_wait_ms"):
+            registry.inc("app_db_pool_wait_seconds_total", labels, stats["requests_wait_ms"] / 1000)
+        registry.set_gauge("app_db_pool_size", stats.get("pool_size", 0), labels)
+        registry.set_gauge("app_db_pool_available", stats.get("pool_available", 0), labels)
+        registry.set_gauge("app_db_pool_waiting", stats.get("requests_waiting", 0), labels)
+
+
+metrics = MetricsRegistry()
+metrics.add_collector(record_pool_stats)
+
+
+@atexit.register
+def _flush_on_exit():
+    if settings.configured and getattr(settings, "METRICS_DIR", "") and metrics._dirty:
+        try:
+            metrics.flush()
+        except OSError:
+            pass
+
+
+def record_request(
+    view_name, method, status, duration_seconds, db_queries, cache_hits, cache_misses
+):
+    metrics.inc("app_http_requests_total", {"view": view_name, "method": method, "status": status})
+    metrics.observe(
+        "app_http_request_duration_seconds",
+        duration_seconds,
+        HTTP_DURATION_BUCKETS,
+        {"view": view_name},
+    )
+    if db_queries:
+        metrics.inc("app_db_queries_total", {"view": view_name}, db_queries)
+    if cache_hits:
+        metrics.inc("app_cache_requests_total", {"result": "hit"}, cache_hits)
+    if cache_misses:
+        metrics.inc("app_cache_requests_total", {"result": "miss"}, cache_misses)
+
+
+def record_email_send(duration_seconds, outcome):
+    if not settings.METRICS_ENABLED:
+        return
+    metrics.observe(
+        "app_email_send_duration_seconds",
+        duration_seconds,
+        EMAIL_DURATION_BUCKETS,
+        {"outcome": outcome},
+    )
+
+
+def record_connection_created(sender, connection, **kwargs):
+    # Pooled checkouts fire connection_created too; the pool counts its own opens.
+    if settings.METRICS_ENABLED and not connection.settings_dict["OPTIONS"].get("pool"):
+        metrics.inc("app_db_connections_opened_total", {"alias": connection.alias})
+
+
+def record_throttled(scope, kind):
+    if settings.METRICS_ENABLED:
+        metrics.inc("app_throttled_requests_total", {"scope": scope, "key": kind})
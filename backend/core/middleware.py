@@ -0,0 +1,138 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .instrumentation import finish_request_metrics, observe_view, start_request_metrics
+from .metrics import record_request
+
+logger = logging.getLogger("core.performance")
+
+
+class PerformanceMiddleware:
+    """Opt-in per-request timing, query counting, Server-Timing headers and metrics."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.instrument = settings.PERFORMANCE_INSTRUMENTATION
+        self.export_metrics = settings.METRICS_ENABLED
+        if not (self.instrument or self.export_metrics):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        metrics, token = start_request_metrics()
+        try:
+            with connection.execute_wrapper(metrics.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = start_request_metrics()
+        try:
+            # Async ORM calls run on the request's thread-sensitive worker thread,
+            # so the query wrapper has to be installed on that thread's connection.
+            await sync_to_async(connection.execute_wrappers.append)(metrics.execute_wrapper)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(connection.execute_wrappers.remove)(metrics.execute_wrapper)
+        finally:
+            finish_request_metrics(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        duration_ms = (time.perf_counter() - metrics.started) * 1000
+        db_ms = metrics.db_seconds * 1000
+        template_ms = metrics.template_seconds * 1000
+        match = request.resolver_match
+        view_name = match.view_name if match else "unresolved"
+        if self.export_metrics:
+            record_request(
+                view_name,
+                request.method,
+                response.status_code,
+                duration_ms / 1000,
+                metrics.db_queries,
+                metrics.cache_hits,
+                metrics.cache_misses,
+            )
+        if not self.instrument:
+            return response
+
+        observe_view(view_name, duration_ms)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f"total;dur={duration_ms:.2f}",
+                f'db;dur={db_ms:.2f};desc="{metrics.db_queries} queries"',
+                f"tpl;dur={template_ms:.2f}",
+                f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+            ]
+        )
+        logger.info(
+            "request view=%s method=%s status=%s duration_ms=%.2f db_queries=%d db_ms=%.2f "
+            "template_ms=%.2f cache_hits=%d cache_misses=%d",
+            view_name,
+            request.method,
+            response.status_code,
+            duration_ms,
+            metrics.db_queries,
+            db_ms,
+            template_ms,
+            metrics.cache_hits,
+            metrics.cache_misses,
+            extra={
+                "view": view_name,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": duration_ms,
+                "db_queries": metrics.db_queries,
+                "db_ms": db_ms,
+                "template_ms": template_ms,
+                "cache_hits": metrics.cache_hits,
+                "cache_misses": metrics.cache_misses,
+            },
+        )
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that stays in async mode under ASGI instead of forcing every
+    request below it through a thread."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
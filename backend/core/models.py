@@ -1,4 +1,16 @@
+import copy
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.db import models
+from django.utils import timezone
+
+from .instrumentation import record_cache
+
+SITE_SETTINGS_CACHE_KEY = "core:site_settings"
+SITE_SETTINGS_VERSION_KEY = "core:site_settings:version"
 
 
 class SiteSettings(models.Model):
@@ -12,10 +24,96 @@ class SiteSettings(models.Model):
     email_use_tls = models.BooleanField(default=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Process-local copy: (instance, version, expires_at).
+    _local_cache = None
+
     def __str__(self):
         return "Site Settings"
 
+    @property
+    def cache_version(self):
+        return self.updated_at.isoformat() if self.updated_at else ""
+
     @classmethod
     def get_solo(cls):
-        settings, _ = cls.objects.get_or_create(pk=1)
-        return settings
+        now = time.monotonic()
+        local = cls._local_cache
+        if local is not None and local[2] > now:
+            record_cache(hit=True)
+            return copy.copy(local[0])
+
+        version = cache.get(SITE_SETTINGS_VERSION_KEY)
+        if local is not None and version is not None and version == local[1]:
+            record_cache(hit=True)
+            cls._store_local(local[0], now)
+            return copy.copy(local[0])
+
+        settings = cache.get(SITE_SETTINGS_CACHE_KEY)
+        record_cache(hit=settings is not None and settings.cache_version == version)
+        if settings is None or settings.cache_version != version:
+            settings, _ = cls.objects.get_or_create(pk=1)
+            cls.store_shared(settings)
+        cls._store_local(settings, now)
+        return copy.copy(settings)
+
+    @classmethod
+    async def aget_solo(cls):
+        local = cls._local_cache
+        if local is not None and local[2] > time.monotonic():
+            record_cache(hit=True)
+            return copy.copy(local[0])
+        return await sync_to_async(cls.get_solo)()
+
+    @classmethod
+    def store_shared(cls, instance):
+        instance = copy.copy(instance)
+        timeout = django_settings.SITE_SETTINGS_CACHE_TIMEOUT
+        cache.set_many(
+            {
+                SITE_SETTINGS_CACHE_KEY: instance,
+                SITE_SETTINGS_VERSION_KEY: instance.cache_version,
+            },
+            timeout,
+        )
+        cls._store_local(instance, time.monotonic())
+
+    @classmethod
+    def clear_cache(cls):
+        cache.delete_many([SITE_SETTINGS_CACHE_KEY, SITE_SETTINGS_VERSION_KEY])
+        cls._local_cache = None
+
+    @classmethod
+    def _store_local(cls, instance, now):
+        ttl = django_settings.SITE_SETTINGS_LOCAL_TTL
+        cls._local_cache = (instance, instance.cache_version, now + ttl)
+
+
+class OutboundEmail(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="core_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
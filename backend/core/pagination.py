@@ -0,0 +1,183 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Q
+
+from .cache_utils import atable_version, normalize_query, query_digest, table_version
+from .instrumentation import record_cache
+
+CURSOR_SALT = "core.pagination.cursor"
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """Seek pagination over a unique ordering such as ("email", "id").
+
+    Cursors are signed, opaque tokens holding the ordering values of the
+    boundary row, so each page is a single indexed range scan instead of a
+    COUNT(*) plus a growing OFFSET.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        values, direction = self.decode_cursor(cursor)
+        rows = list(self._page_queryset(values, direction))
+        return self._build_page(rows, values, direction)
+
+    async def aget_page(self, cursor=None):
+        values, direction = self.decode_cursor(cursor)
+        rows = [row async for row in self._page_queryset(values, direction)]
+        return self._build_page(rows, values, direction)
+
+    def _page_queryset(self, values, direction):
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, direction))
+        ordering = self.ordering if direction == NEXT else self._reversed_ordering()
+        return queryset.order_by(*ordering)[: self.per_page + 1]
+
+    def _build_page(self, rows, values, direction):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+
+        has_next = has_more if direction == NEXT else values is not None
+        has_previous = values is not None if direction == NEXT else has_more
+        next_cursor = self.encode_cursor(rows[-1], NEXT) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], PREVIOUS) if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        return signing.dumps([direction, values], salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, NEXT
+        try:
+            direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            return None, NEXT
+        if direction not in (NEXT, PREVIOUS) or len(values) != len(self.ordering):
+            return None, NEXT
+        return values, direction
+
+    def _reversed_ordering(self):
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering)
+
+    def _seek_filter(self, values, direction):
+        condition = Q()
+        equal_prefix = Q()
+        leading = None
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            lookup = "lt" if descending == (direction == NEXT) else "gt"
+            condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+            equal_prefix &= Q(**{name: value})
+            if leading is None:
+                # A sargable bound on the leading column lets the database use a range scan.
+                leading = Q(**{f"{name}__{lookup}e": value})
+        return leading & condition
+
+
+class ListCount:
+    def __init__(self, value, estimated=False):
+        self.value = value
+        self.estimated = estimated
+
+
+def estimated_table_count(model):
+    table = model._meta.db_table
+    vendor = connection.vendor
+    try:
+        with connection.cursor() as cursor:
+            if vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table]
+                )
+            elif vendor == "sqlite":
+                # One row per index; a partial index only counts the rows it covers.
+                cursor.execute(
+                    "SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s", [table]
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    value = int(row[0])
+    return value if value >= 0 else None
+
+
+def _count_cache_key(model, version, query):
+    return "core:list_count:" + query_digest(model._meta.db_table, version, normalize_query(query))
+
+
+def list_count(queryset, query=""):
+    """Total for an admin list: a planner estimate for large unfiltered tables,
+    otherwise an exact count cached per table version and normalized query."""
+    model = queryset.model
+    if not query:
+        estimate = estimated_table_count(model)
+        if estimate is not None and estimate >= settings.ADMIN_LIST_ESTIMATE_THRESHOLD:
+            return ListCount(estimate, estimated=True)
+
+    key = _count_cache_key(model, table_version(model), query)
+    value = cache.get(key)
+    record_cache(hit=value is not None)
+    if value is None:
+        value = queryset.count()
+        cache.set(key, value, settings.ADMIN_LIST_COUNT_CACHE_TTL)
+    return ListCount(value)
+
+
+async def alist_count(queryset, query=""):
+    model = queryset.model
+    if not query:
+        estimate = await sync_to_async(estimated_table_count)(model)
+        if estimate is not None and estimate >= settings.ADMIN_LIST_ESTIMATE_THRESHOLD:
+            return ListCount(estimate, estimated=True)
+
+    key = _count_cache_key(model, await atable_version(model), query)
+    value = await cache.aget(key)
+    record_cache(hit=value is not None)
+    if value is None:
+        value = await queryset.acount()
+        await cache.aset(key, value, settings.ADMIN_LIST_COUNT_CACHE_TTL)
+    return ListCount(value)
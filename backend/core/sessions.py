@@ -0,0 +1,117 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+
+COOKIE_SALT = "core.sessions.cookie"
+
+
+class SessionStore(cached_db.SessionStore):
+    """cached_db sessions that skip writes when nothing changed.
+
+    Anonymous sessions small enough to fit in ``SESSION_COOKIE_MAX_BYTES`` are
+    kept in a signed cookie instead, so flows such as password reset never
+    create a session row. Signed cookie keys always contain ":", which random
+    database keys never do. Once a user logs in (or the data grows) the
+    session moves to a fresh database key.
+    """
+
+    def __init__(self, session_key=None):
+        self._loaded_digest = None
+        super().__init__(session_key)
+
+    def load(self):
+        if self._is_cookie_key(self.session_key):
+            data = self._load_cookie()
+        else:
+            data = super().load()
+        self._loaded_digest = self._digest(data)
+        return data
+
+    async def aload(self):
+        if self._is_cookie_key(self.session_key):
+            data = self._load_cookie()
+        else:
+            data = await super().aload()
+        self._loaded_digest = self._digest(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        cookie_value = self._cookie_value(data)
+        if cookie_value is not None:
+            if not must_create and self.session_key and not self._is_cookie_key(self.session_key):
+                self.delete(self.session_key)
+            self._session_key = cookie_value
+        elif self._is_cookie_key(self.session_key):
+            self._session_key = None
+            self.create()
+        elif must_create or not self._unchanged(data):
+            super().save(must_create)
+        self._loaded_digest = self._digest(data)
+
+    async def asave(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        cookie_value = self._cookie_value(data)
+        if cookie_value is not None:
+            if not must_create and self.session_key and not self._is_cookie_key(self.session_key):
+                await self.adelete(self.session_key)
+            self._session_key = cookie_value
+        elif self._is_cookie_key(self.session_key):
+            self._session_key = None
+            await self.acreate()
+        elif must_create or not self._unchanged(data):
+            await super().asave(must_create)
+        self._loaded_digest = self._digest(data)
+
+    def delete(self, session_key=None):
+        if self._is_cookie_key(session_key or self.session_key):
+            return
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        if self._is_cookie_key(session_key or self.session_key):
+            return
+        await super().adelete(session_key)
+
+    def exists(self, session_key):
+        return not self._is_cookie_key(session_key) and super().exists(session_key)
+
+    async def aexists(self, session_key):
+        return not self._is_cookie_key(session_key) and await super().aexists(session_key)
+
+    @staticmethod
+    def _is_cookie_key(session_key):
+        return bool(session_key) and ":" in session_key
+
+    def _load_cookie(self):
+        try:
+            return signing.loads(
+                self.session_key,
+                salt=COOKIE_SALT,
+                serializer=self.serializer,
+                max_age=self.get_session_cookie_age(),
+            )
+        except (signing.BadSignature, ValueError):
+            self._session_key = None
+            return {}
+
+    def _cookie_value(self, data):
+        if not data or SESSION_KEY in data:
+            return None
+        value = signing.dumps(data, salt=COOKIE_SALT, serializer=self.serializer, compress=True)
+        if len(value) > settings.SESSION_COOKIE_MAX_BYTES:
+            return None
+        return value
+
+    def _unchanged(self, data):
+        return (
+            self.session_key is not None
+            and not settings.SESSION_SAVE_EVERY_REQUEST
+            and self._loaded_digest == self._digest(data)
+        )
+
+    def _digest(self, data):
+        return hashlib.sha256(self.serializer().dumps(data)).digest()
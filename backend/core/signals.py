@@ -0,0 +1,33 @@
+import copy
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .email_utils import email_pool
+from .metrics import record_connection_created
+from .models import SiteSettings
+
+connection_created.connect(record_connection_created, dispatch_uid="core.metrics.connections")
+
+
+@receiver(post_save, sender=SiteSettings)
+def refresh_site_settings_cache(sender, instance, **kwargs):
+    # After commit, so a rolled-back save never reaches the caches.
+    saved = copy.copy(instance)
+
+    def refresh():
+        SiteSettings.store_shared(saved)
+        email_pool.clear()
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_delete, sender=SiteSettings)
+def clear_site_settings_cache(sender, instance, **kwargs):
+    def clear():
+        SiteSettings.clear_cache()
+        email_pool.clear()
+
+    transaction.on_commit(clear)
@@ -0,0 +1,14 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Content-hashed static files with gzip and Brotli copies written at build time.
+
+    Until ``build_static`` has written a manifest (tests, ``runserver``), URLs fall
+    back to the unhashed names so pages still render straight from the finders.
+    """
+
+    def stored_name(self, name):
+        if not self.manifest_hash and not self.hashed_files:
+            return name
+        return super().stored_name(name)
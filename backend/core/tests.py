@@ -0,0 +1,634 @@
+import json
+import os
+import socket
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings as django_settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import OperationalError
+from django.templatetags.static import static
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .email_utils import EmailConnectionPool, email_pool, send_test_email
+from .instrumentation import reset_view_stats, view_stats
+from .mail_queue import enqueue_email, send_queued_mail
+from .management.commands.startup import deploy_fingerprint, migration_graph_hash
+from .metrics import metrics, render_exposition
+from .models import SITE_SETTINGS_VERSION_KEY, OutboundEmail, SiteSettings
+from .pagination import KeysetPaginator, alist_count, estimated_table_count, list_count
+from .sessions import SessionStore
+
+User = get_user_model()
+
+
+class SiteSettingsCacheTests(TestCase):
+    def setUp(self):
+        SiteSettings.clear_cache()
+
+    def test_repeat_renders_skip_settings_query(self):
+        self.client.get(reverse("home"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("home"))
+
+    def test_save_writes_through_to_cache(self):
+        settings = SiteSettings.get_solo()
+        settings.registration_enabled = True
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(SiteSettings.get_solo().registration_enabled)
+
+    def test_rolled_back_save_leaves_the_cache_alone(self):
+        settings = SiteSettings.get_solo()
+        settings.registration_enabled = True
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                settings.save()
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(SiteSettings.get_solo().registration_enabled)
+
+    @override_settings(SITE_SETTINGS_LOCAL_TTL=0)
+    def test_version_change_reloads_from_database(self):
+        SiteSettings.get_solo()
+        SiteSettings.objects.filter(pk=1).update(registration_enabled=True)
+        cache.set(SITE_SETTINGS_VERSION_KEY, "stale")
+
+        self.assertTrue(SiteSettings.get_solo().registration_enabled)
+
+
+class SiteSettingsContextProcessorTests(TestCase):
+    def setUp(self):
+        SiteSettings.clear_cache()
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="pass-1234", is_staff=True
+        )
+        self.client.force_login(self.admin)
+
+    def assertNoSettingsQueries(self, response, queries):
+        self.assertEqual(response.status_code, 200)
+        settings_queries = [q["sql"] for q in queries if "core_sitesettings" in q["sql"]]
+        self.assertEqual(settings_queries, [])
+
+    def test_htmx_partial_skips_settings_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin-users"), HTTP_HX_REQUEST="true")
+        self.assertNoSettingsQueries(response, queries)
+
+    def test_authenticated_page_skips_settings_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("dashboard"))
+        self.assertNoSettingsQueries(response, queries)
+
+    def test_missing_table_falls_back_to_defaults(self):
+        self.client.logout()
+        with mock.patch.object(SiteSettings, "get_solo", side_effect=OperationalError):
+            response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["site_settings"].registration_enabled)
+
+
+class EmailConnectionPoolTests(TestCase):
+    config = {
+        "host": "smtp.example.com",
+        "port": 587,
+        "username": "user",
+        "password": "secret",
+        "use_tls": True,
+    }
+
+    def test_connection_is_reused(self):
+        pool = EmailConnectionPool(max_connections=2, idle_timeout=60)
+        with pool.connection(self.config) as first:
+            pass
+        with pool.connection(self.config) as second:
+            pass
+        self.assertIs(first, second)
+
+    def test_failed_send_discards_connection(self):
+        pool = EmailConnectionPool(max_connections=2, idle_timeout=60)
+        with self.assertRaises(RuntimeError):
+            with pool.connection(self.config) as first:
+                raise RuntimeError
+        with pool.connection(self.config) as second:
+            pass
+        self.assertIsNot(first, second)
+
+    def test_site_settings_change_evicts_pool(self):
+        send_test_email(SiteSettings.get_solo(), "admin@example.com")
+        self.assertTrue(email_pool._idle)
+
+        settings = SiteSettings.get_solo()
+        settings.email_host = "smtp.example.com"
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+
+        self.assertFalse(email_pool._idle)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class OutboundEmailQueueTests(TestCase):
+    def test_worker_sends_queued_mail(self):
+        enqueue_email(
+            "Hello", "Body", "from@example.com", ["to@example.com"], html_body="<p>Hi</p>"
+        )
+
+        call_command("send_queued_mail", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>Hi</p>")
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.STATUS_SENT)
+
+    @override_settings(EMAIL_QUEUE_RETRY_BASE_DELAY=30)
+    def test_failures_back_off_then_dead_letter(self):
+        item = enqueue_email("Hello", "Body", "from@example.com", ["to@example.com"])
+        with mock.patch(
+            "django.core.mail.EmailMultiAlternatives.send", side_effect=ConnectionError("down")
+        ):
+            send_queued_mail(max_attempts=2)
+            item.refresh_from_db()
+            self.assertEqual(item.status, OutboundEmail.STATUS_PENDING)
+            self.assertGreater(item.next_attempt_at, timezone.now())
+            self.assertIn("down", item.last_error)
+
+            OutboundEmail.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+            send_queued_mail(max_attempts=2)
+            item.refresh_from_db()
+
+        self.assertEqual(item.status, OutboundEmail.STATUS_DEAD)
+        self.assertEqual(item.attempts, 2)
+        self.assertEqual(mail.outbox, [])
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        for index in range(7):
+            User.objects.create_user(email=f"user{index}@example.com")
+        self.paginator = KeysetPaginator(User.objects.all(), ("email", "id"), 3)
+
+    def emails(self, page):
+        return [user.email for user in page]
+
+    def test_walks_forward_and_back(self):
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(first.next_cursor)
+        third = self.paginator.get_page(second.next_cursor)
+
+        self.assertFalse(first.has_previous)
+        self.assertEqual(self.emails(second), [f"user{i}@example.com" for i in (3, 4, 5)])
+        self.assertEqual(self.emails(third), ["user6@example.com"])
+        self.assertFalse(third.has_next)
+
+        back = self.paginator.get_page(third.previous_cursor)
+        self.assertEqual(self.emails(back), self.emails(second))
+        self.assertEqual(
+            self.emails(self.paginator.get_page(back.previous_cursor)), self.emails(first)
+        )
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        page = self.paginator.get_page("not-a-cursor")
+        self.assertEqual(self.emails(page)[0], "user0@example.com")
+
+    async def test_async_pages_match_sync_pages(self):
+        first = await self.paginator.aget_page()
+        second = await self.paginator.aget_page(first.next_cursor)
+        self.assertEqual(self.emails(second), [f"user{i}@example.com" for i in (3, 4, 5)])
+        back = await self.paginator.aget_page(second.previous_cursor)
+        self.assertEqual(self.emails(back), self.emails(first))
+
+
+class ListCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(email="first@example.com")
+
+    def test_exact_count_is_cached_until_table_changes(self):
+        users = User.objects.filter(email__icontains="example")
+        self.assertEqual(list_count(users, "Example ").value, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(list_count(users, "  example").value, 1)
+
+        User.objects.create_user(email="second@example.com")
+        self.assertEqual(list_count(users, "example").value, 2)
+
+    def test_async_count_shares_the_cache(self):
+        users = User.objects.filter(email__icontains="example")
+        self.assertEqual(async_to_sync(alist_count)(users, "example").value, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(list_count(users, "Example").value, 1)
+
+    def test_large_unfiltered_table_uses_estimate(self):
+        with mock.patch("core.pagination.estimated_table_count", return_value=250000):
+            count = list_count(User.objects.all())
+        self.assertTrue(count.estimated)
+        self.assertEqual(count.value, 250000)
+
+    def test_estimate_reads_planner_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(estimated_table_count(User), 1)
+
+    def test_estimate_ignores_partial_indexes(self):
+        User.objects.create_user(email="staff@example.com", is_staff=True)
+        for index in range(3):
+            User.objects.create_user(email=f"member{index}@example.com")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            if connection.vendor == "sqlite":
+                # Put the staff-only partial index, which covers one row, first.
+                cursor.execute(
+                    "SELECT tbl, idx, stat FROM sqlite_stat1 WHERE tbl = 'accounts_user' "
+                    "ORDER BY CAST(stat AS INTEGER)"
+                )
+                rows = cursor.fetchall()
+                cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'accounts_user'")
+                cursor.executemany("INSERT INTO sqlite_stat1 VALUES (%s, %s, %s)", rows)
+        self.assertEqual(estimated_table_count(User), 5)
+
+
+@override_settings(ROOT_URLCONF="config.urls_async")
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="user@example.com", password="pass-1234")
+
+    def test_only_asgi_routes_hot_pages_to_async_views(self):
+        paths = ["/", "/dashboard/", "/profile/", "/admin/users/", "/admin/groups/"]
+        for path in paths:
+            self.assertTrue(iscoroutinefunction(resolve(path).func), path)
+        with override_settings(ROOT_URLCONF="config.urls"):
+            for path in paths:
+                self.assertFalse(iscoroutinefunction(resolve(path).func), path)
+
+    async def test_home_renders_for_anonymous_users(self):
+        response = await self.async_client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("site_settings", response.context)
+
+    async def test_dashboard_redirects_anonymous_users_to_login(self):
+        response = await self.async_client.get(reverse("dashboard"))
+        self.assertRedirects(
+            response,
+            f"{reverse('login')}?next={reverse('dashboard')}",
+            fetch_redirect_response=False,
+        )
+
+    async def test_dashboard_renders_for_logged_in_users(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], self.user)
+
+
+class BuildStaticTests(TestCase):
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        self.source = Path(source.name)
+        (self.source / "css").mkdir()
+        (self.source / "css" / "app.css").write_text("body { color: #0f172a; }\n" * 200)
+        settings_override = override_settings(STATICFILES_DIRS=[self.source], STATIC_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = Path(root.name)
+
+    def build(self):
+        out = StringIO()
+        call_command("build_static", stdout=out)
+        return out.getvalue()
+
+    def test_precompresses_and_skips_unchanged_sources(self):
+        output = self.build()
+        self.assertIn("total (1 files)", output)
+        hashed = json.loads((self.root / "static-build.json").read_text())["files"][0]["name"]
+        self.assertTrue((self.root / f"{hashed}.gz").exists())
+        self.assertTrue((self.root / f"{hashed}.br").exists())
+        self.assertFalse((self.root / "css" / "app.css").exists())
+
+        self.assertIn("skipping collectstatic", self.build())
+        (self.source / "css" / "app.css").write_text("body { color: #fff; }\n" * 200)
+        self.assertIn("total (1 files)", self.build())
+
+    def test_hashed_files_are_served_immutable_and_precompressed(self):
+        self.build()
+        url = static("css/app.css")
+        self.assertRegex(url, r"^/static/css/app\.[0-9a-f]{12}\.css$")
+        response = Client().get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertIn("immutable", response["Cache-Control"])
+        response.close()
+
+
+class StartupCommandTests(TestCase):
+    def setUp(self):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        settings_override = override_settings(
+            STARTUP_STATE_FILE=os.path.join(state_dir.name, "startup.json")
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        env = mock.patch.dict(
+            os.environ,
+            {"INITIAL_ADMIN_EMAIL": "boot@example.com", "INITIAL_ADMIN_PASSWORD": "pass-1234"},
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+    def graph_hash(self):
+        return migration_graph_hash(MigrationExecutor(connection).loader.graph)
+
+    def startup(self, *args):
+        out = StringIO()
+        with mock.patch("core.management.commands.startup.call_command") as command:
+            call_command("startup", "--skip-static", *args, stdout=out)
+        return command, out.getvalue()
+
+    def test_skips_migrate_and_bootstraps_admin_once(self):
+        command, output = self.startup()
+        command.assert_not_called()
+        self.assertIn("Migrations up to date", output)
+        self.assertIn("Startup ready in", output)
+        self.assertTrue(User.objects.filter(email="boot@example.com", is_staff=True).exists())
+
+        User.objects.all().delete()
+        _command, output = self.startup()
+        self.assertIn("already checked for this deploy", output)
+        self.assertFalse(User.objects.exists())
+
+        self.startup("--force-bootstrap")
+        self.assertTrue(User.objects.filter(email="boot@example.com").exists())
+
+    def test_stored_fingerprint_is_keyed_with_the_secret_key(self):
+        self.startup()
+        stored = json.loads(Path(django_settings.STARTUP_STATE_FILE).read_text())["deploy"]
+        self.assertEqual(stored, deploy_fingerprint(self.graph_hash()))
+        with override_settings(SECRET_KEY="another-secret-key"):
+            self.assertNotEqual(deploy_fingerprint(self.graph_hash()), stored)
+
+    def test_metrics_snapshots_of_the_previous_deploy_are_removed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "old-host-123.json").write_text("{}")
+            with override_settings(METRICS_DIR=directory):
+                _command, output = self.startup()
+            self.assertEqual(os.listdir(directory), [])
+        self.assertIn("Removed 1 metrics snapshot(s).", output)
+
+    def test_pending_migrations_are_applied(self):
+        with mock.patch(
+            "django.db.migrations.executor.MigrationExecutor.migration_plan",
+            return_value=[("migration", False)],
+        ):
+            command, output = self.startup()
+        command.assert_called_once_with("migrate", interactive=False, verbosity=0)
+        self.assertIn("Applying 1 migration(s)", output)
+
+
+@override_settings(PERFORMANCE_INSTRUMENTATION=True)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        reset_view_stats()
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="pass-1234", is_staff=True
+        )
+
+    def test_views_emit_server_timing_and_histograms(self):
+        self.client.force_login(self.admin)
+        templates = [
+            {
+                **django_settings.TEMPLATES[0],
+                "BACKEND": "core.instrumentation.InstrumentedDjangoTemplates",
+            }
+        ]
+        with override_settings(TEMPLATES=templates), self.assertLogs("core.performance") as logs:
+            for name in ("home", "dashboard", "profile", "admin-users", "admin-groups"):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                timing = response["Server-Timing"]
+                self.assertRegex(timing, r'db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+                self.assertNotIn("tpl;dur=0.00", timing)
+
+        stats = view_stats()
+        self.assertEqual(stats["admin-users"]["count"], 1)
+        self.assertIn("view=profile", logs.output[2])
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION=False)
+    def test_disabled_middleware_adds_no_header(self):
+        response = self.client.get(reverse("home"))
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="scrape-token", METRICS_DIR="")
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="pass-1234", is_staff=True
+        )
+
+    def test_requests_are_exported(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse("admin-users"))
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE app_http_request_duration_seconds histogram", body)
+        self.assertIn(
+            'app_http_requests_total{method="GET",status="200",view="admin-users"} 1', body
+        )
+        self.assertIn(
+            'app_http_request_duration_seconds_bucket{view="admin-users",le="+Inf"} 1', body
+        )
+        self.assertRegex(body, r'app_db_queries_total\{view="admin-users"\} [1-9]')
+
+    def test_endpoint_requires_token_or_staff(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 302)
+        member = User.objects.create_user(email="member@example.com", password="pass-1234")
+        self.client.force_login(member)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_endpoint_is_not_found(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 404)
+
+    def test_snapshots_from_other_workers_are_merged(self):
+        metrics.inc("app_http_requests_total", {"view": "home", "method": "GET", "status": "200"})
+        other = {
+            "counters": [
+                [
+                    "app_http_requests_total",
+                    [["method", "GET"], ["status", "200"], ["view", "home"]],
+                    4,
+                ]
+            ],
+            "histograms": [
+                [
+                    "app_email_send_duration_seconds",
+                    [["outcome", "sent"]],
+                    {"buckets": [0.1, 1.0], "counts": [2, 1, 0], "sum": 0.6, "count": 3},
+                ]
+            ],
+            "gauges": [],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            with open(f"{directory}/999999.json", "w") as handle:
+                json.dump(other, handle)
+            with override_settings(METRICS_DIR=directory):
+                body = render_exposition()
+                metrics.flush()
+                self.assertTrue(any(name.endswith(".json") for name in os.listdir(directory)))
+
+        self.assertIn('app_http_requests_total{method="GET",status="200",view="home"} 5', body)
+        self.assertIn('app_email_send_duration_seconds_bucket{outcome="sent",le="1.0"} 3', body)
+        self.assertIn('app_email_send_duration_seconds_count{outcome="sent"} 3', body)
+
+    def test_gauges_from_stale_snapshots_are_skipped(self):
+        def snapshot(pid):
+            return {
+                "counters": [["app_db_pool_checkouts_total", [["alias", "default"]], 2]],
+                "histograms": [],
+                "gauges": [["app_db_pool_size", [["alias", "default"], ["pid", pid]], 4]],
+            }
+
+        host = socket.gethostname()
+        with tempfile.TemporaryDirectory() as directory:
+            # The parent process is alive; no process has this PID.
+            for pid in (os.getppid(), 4_000_000):
+                with open(f"{directory}/{host}-{pid}.json", "w") as handle:
+                    json.dump(snapshot(pid), handle)
+            with open(f"{directory}/other-host-1.json", "w") as handle:
+                json.dump(snapshot(1), handle)
+            old = time.time() - 3600
+            os.utime(f"{directory}/other-host-1.json", (old, old))
+            with override_settings(METRICS_DIR=directory):
+                body = render_exposition()
+
+        self.assertIn('app_db_pool_checkouts_total{alias="default"} 6', body)
+        self.assertIn(f'app_db_pool_size{{alias="default",pid="{os.getppid()}"}} 4', body)
+        self.assertNotIn('pid="4000000"', body)
+        self.assertNotIn('pid="1"', body)
+
+    def test_email_sends_are_timed(self):
+        site_settings = SiteSettings.get_solo()
+        send_test_email(site_settings, "to@example.com")
+        body = render_exposition()
+        self.assertIn('app_email_send_duration_seconds_count{outcome="sent"} 1', body)
+
+    def test_pool_stats_are_exported_as_deltas(self):
+        pool = mock.Mock()
+        pool.pop_stats.side_effect = [
+            {"requests_num": 7, "requests_wait_ms": 250, "connections_num": 2, "pool_size": 2},
+            {"requests_num": 3, "pool_size": 2, "pool_available": 1},
+        ]
+        pooled = dict(connection.settings_dict, OPTIONS={"pool": {"max_size": 2}})
+        with (
+            override_settings(DATABASES={"default": pooled}),
+            mock.patch("core.metrics.connections", {"default": mock.Mock(pool=pool)}),
+        ):
+            render_exposition()
+            body = render_exposition()
+        self.assertIn('app_db_pool_checkouts_total{alias="default"} 10', body)
+        self.assertIn('app_db_pool_wait_seconds_total{alias="default"} 0.25', body)
+        self.assertIn('app_db_pool_connections_opened_total{alias="default"} 2', body)
+        self.assertRegex(body, r'app_db_pool_available\{alias="default",pid="\d+"\} 1')
+
+
+@override_settings(SESSION_ENGINE="core.sessions", USER_CACHE_ENABLED=True)
+class CoalescingSessionStoreTests(TestCase):
+    def setUp(self):
+        caches["sessions"].clear()
+        self.user = User.objects.create_user(email="member@example.com", password="pass-1234")
+
+    def test_small_anonymous_session_lives_in_signed_cookie(self):
+        store = SessionStore()
+        store["_password_reset_token"] = "set-password"
+        with self.assertNumQueries(0):
+            store.save()
+        self.assertIn(":", store.session_key)
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(SessionStore(store.session_key)["_password_reset_token"], "set-password")
+
+    @override_settings(SESSION_COOKIE_MAX_BYTES=64)
+    def test_large_anonymous_session_is_stored_in_database(self):
+        store = SessionStore()
+        store["payload"] = "x" * 500
+        store.save()
+        self.assertTrue(Session.objects.filter(session_key=store.session_key).exists())
+
+    def test_unchanged_session_is_not_rewritten(self):
+        self.client.force_login(self.user)
+        session_key = self.client.cookies[django_settings.SESSION_COOKIE_NAME].value
+        store = SessionStore(session_key)
+        store["_auth_user_id"] = store["_auth_user_id"]
+        with self.assertNumQueries(0):
+            store.save()
+        store["theme"] = "dark"
+        with CaptureQueriesContext(connection) as queries:
+            store.save()
+        self.assertTrue(queries.captured_queries)
+
+    def test_login_moves_cookie_session_to_database(self):
+        self.client.get(self._reset_url())
+        self.assertFalse(Session.objects.exists())
+        response = self.client.post(
+            reverse("login"), {"username": "member@example.com", "password": "pass-1234"}
+        )
+        self.assertEqual(response.status_code, 302)
+        session_key = self.client.cookies[django_settings.SESSION_COOKIE_NAME].value
+        self.assertNotIn(":", session_key)
+        self.assertTrue(Session.objects.filter(session_key=session_key).exists())
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse("dashboard")).status_code, 200)
+
+    def _reset_url(self):
+        return reverse(
+            "password_reset_confirm",
+            args=[
+                urlsafe_base64_encode(force_bytes(self.user.pk)),
+                default_token_generator.make_token(self.user),
+            ],
+        )
+
+
+class PurgeSessionsCommandTests(TestCase):
+    def test_only_expired_sessions_are_purged(self):
+        now = timezone.now()
+        for index in range(5):
+            Session.objects.create(
+                session_key=f"expired{index:04d}", session_data="", expire_date=now - timedelta(1)
+            )
+        Session.objects.create(
+            session_key="active0001", session_data="", expire_date=now + timedelta(1)
+        )
+        stdout = StringIO()
+        call_command("purge_sessions", "--batch-size", "2", stdout=stdout)
+        self.assertIn("Purged 5 expired sessions.", stdout.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list("session_key", flat=True)), ["active0001"]
+        )
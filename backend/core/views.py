@@ -1,6 +1,15 @@
+import hmac
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from accounts.permissions import admin_required, async_login_required
+
+from .context_processors import aprime_context
+from .metrics import render_exposition
+
 
 def home(request):
     return render(request, "core/home.html")
@@ -9,3 +18,34 @@ def home(request):
 @login_required
 def dashboard(request):
     return render(request, "core/dashboard.html")
+
+
+# Async variants, routed by config.urls_async under ASGI.
+async def ahome(request):
+    await aprime_context(request)
+    return render(request, "core/home.html")
+
+
+@async_login_required
+async def adashboard(request):
+    await aprime_context(request)
+    return render(request, "core/dashboard.html")
+
+
+def metrics(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        return _metrics_response(request)
+    return _staff_metrics_response(request)
+
+
+def _metrics_response(request):
+    return HttpResponse(
+        render_exposition(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+_staff_metrics_response = admin_required(_metrics_response)
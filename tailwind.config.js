@@ -0,0 +1,9 @@
+/** @type {import('tailwindcss').Config} */
+module.exports = {
+  // Classes are only kept if they appear in these files; core/forms.py adds widget classes.
+  content: ["./templates/**/*.html", "./backend/**/*.py"],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};